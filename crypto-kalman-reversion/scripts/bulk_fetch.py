@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from alpaca.data.requests import CryptoBarsRequest
+from alpaca.data.timeframe import TimeFrame
+from alpaca.trading.requests import GetAssetsRequest
+from alpaca.trading.enums import AssetClass, AssetStatus
+
+"""
+Bulk Alpaca crypto bar download used by the liquidity filter.
+
+Symbols are grouped into multi-symbol CryptoBarsRequests, the batches run on a
+bounded thread pool behind a shared rate limiter, and the returned bars are
+pivoted straight into (date x symbol) close price and dollar volume panels.
+This makes ranking every Alpaca-tradable pair a handful of requests instead
+of one request per coin.
+"""
+
+
+# --- Rate Limiting --- #
+class RateLimiter:
+    """Spaces calls evenly so at most `max_calls` start in any `period` seconds."""
+
+    def __init__(self, max_calls, period=60.0):
+        self.interval = period / max_calls
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        # Reserve the next free slot under the lock, then sleep outside it
+        with self.lock:
+            slot = max(self.next_slot, time.monotonic())
+            self.next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# --- Universe --- #
+def get_tradable_crypto_symbols(trading_client, quote="USD"):
+    """Return every active, tradable Alpaca crypto pair quoted in `quote`."""
+    assets = trading_client.get_all_assets(
+        GetAssetsRequest(asset_class=AssetClass.CRYPTO, status=AssetStatus.ACTIVE)
+    )
+    symbols = [a.symbol for a in assets if a.tradable and a.symbol.endswith(f"/{quote}")]
+    return sorted(symbols)
+
+
+# --- Batched Requests --- #
+def fetch_bar_batch(client, symbols, start, end, timeframe=TimeFrame.Day, limiter=None, retries=3):
+    """Fetch bars for a list of symbols in one request, retrying with backoff."""
+    req = CryptoBarsRequest(
+        symbol_or_symbols=list(symbols),
+        timeframe=timeframe,
+        start=start,
+        end=end
+    )
+    for attempt in range(retries):
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return client.get_crypto_bars(req).df
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            print(f"Retrying batch {symbols[0]}..{symbols[-1]} after error: {e}")
+            time.sleep(2 ** attempt)
+
+
+def fetch_crypto_panel(client, symbols, start, end, timeframe=TimeFrame.Day,
+                       batch_size=50, max_workers=4, max_requests_per_min=180):
+    """
+    Download bars for all `symbols` and return (price_df, dollar_volume_df).
+
+    Both frames are indexed by day with one column per symbol: price is the
+    last close of the day, dollar volume is the day's sum of close * volume.
+    Symbols with no bars in the window are simply absent from the columns.
+    """
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+    limiter = RateLimiter(max_requests_per_min)
+    frames = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_bar_batch, client, batch, start, end, timeframe, limiter): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                bars = future.result()
+            except Exception as e:
+                print(f"Error pulling {len(batch)} symbols ({batch[0]}..{batch[-1]}): {e}")
+                continue
+            if bars is not None and not bars.empty:
+                frames.append(bars)
+
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame()
+
+    # --- Pivot (symbol, timestamp) rows into daily panels --- #
+    bars = pd.concat(frames)
+    close = bars["close"].unstack("symbol")
+    dollar_volume = (bars["close"] * bars["volume"]).unstack("symbol")
+    price_df = close.resample("1D").last()
+    dollar_volume_df = dollar_volume.resample("1D").sum(min_count=1)
+    return price_df, dollar_volume_df
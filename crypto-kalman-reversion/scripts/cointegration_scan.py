@@ -0,0 +1,148 @@
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from statsmodels.tsa.adfvalues import mackinnonp
+from shared_array import SharedArray
+from constants import *
+from shared import read_artifact
+
+"""
+Engle-Granger cointegration scan over every pair in a price panel.
+
+Pairs are first screened by daily log-return correlation. For each anchor
+asset x, the OLS regressions y = a + b x for all of its remaining partners are
+solved at once as a matrix operation, and the ADF regressions on the residual
+spreads are solved as one batch of small least-squares systems. Anchors are
+spread across worker processes that share a single copy of the price panel, so
+a 500-name universe (~125k pairs) screens in minutes. The ADF statistic and
+MacKinnon p-value match statsmodels' `coint(y, x, maxlag=k, autolag=None)`.
+"""
+
+
+# --- Vectorized Engle-Granger Test --- #
+def batched_adf_tstat(resid, lags=1):
+    """
+    ADF t-statistics (no constant, fixed lags) for each column of `resid`.
+
+    Regresses d(e_t) on e_{t-1} and d(e_{t-1}) ... d(e_{t-lags}) for every
+    column simultaneously. Returns the t-statistics and the coefficients on
+    e_{t-1}.
+    """
+    diff = np.diff(resid, axis=0)
+    n = len(diff) - lags
+    # Regressors stacked as (columns, observations, k)
+    regressors = [resid[lags:-1]] + [diff[lags - i:len(diff) - i] for i in range(1, lags + 1)]
+    Z = np.stack(regressors, axis=-1).transpose(1, 0, 2)
+    target = diff[lags:].T
+
+    ZtZ = np.einsum("mtk,mtl->mkl", Z, Z)
+    Zty = np.einsum("mtk,mt->mk", Z, target)
+    ZtZ_inv = np.linalg.inv(ZtZ)
+    coef = np.einsum("mkl,ml->mk", ZtZ_inv, Zty)
+
+    fitted = np.einsum("mtk,mk->mt", Z, coef)
+    sigma2 = np.sum((target - fitted) ** 2, axis=1) / (n - Z.shape[2])
+    se = np.sqrt(sigma2 * ZtZ_inv[:, 0, 0])
+    return coef[:, 0] / se, coef[:, 0]
+
+
+def engle_granger_anchor(prices, anchor, partners, lags=1):
+    """
+    Test y = partners[j] against x = anchor for all partners in one pass.
+
+    Returns the hedge ratio, intercept, ADF statistic, p-value and residual
+    half-life (in bars) for each partner.
+    """
+    x = prices[:, anchor]
+    Y = prices[:, partners]
+
+    # --- OLS residuals for every partner at once --- #
+    x_dm = x - x.mean()
+    Y_mean = Y.mean(axis=0)
+    hedge_ratio = x_dm @ (Y - Y_mean) / (x_dm @ x_dm)
+    intercept = Y_mean - hedge_ratio * x.mean()
+    resid = Y - intercept - np.outer(x, hedge_ratio)
+
+    adf_stat, gamma = batched_adf_tstat(resid, lags=lags)
+    pvalue = np.array([mackinnonp(s, regression="c", N=2) for s in adf_stat])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half_life = np.where(gamma < 0, -np.log(2) / np.log1p(gamma), np.nan)
+    return hedge_ratio, intercept, adf_stat, pvalue, half_life
+
+
+# --- Worker Process State --- #
+_worker = {}
+
+
+def _init_worker(spec):
+    _worker["prices"] = SharedArray.attach(spec)
+
+
+def _scan_anchors(tasks, lags):
+    prices = _worker["prices"].array
+    rows = []
+    for anchor, partners, corr in tasks:
+        stats = engle_granger_anchor(prices, anchor, partners, lags=lags)
+        rows.append((np.full(len(partners), anchor), partners, corr) + stats)
+    return [np.concatenate(col) for col in zip(*rows)] if rows else None
+
+
+def scan_cointegration(price_df, min_corr=0.5, lags=1, max_missing=0.05, max_workers=None, chunk_size=8):
+    """
+    Run the correlation prefilter and Engle-Granger tests over all pairs.
+
+    `price_df` is a (date x ticker) panel. Tickers missing more than
+    `max_missing` of the dates are dropped, remaining gaps are forward filled,
+    and pairs whose log-return correlation is below `min_corr` are skipped.
+    Returns one row per tested pair, sorted by p-value.
+    """
+    # --- Align the panel --- #
+    price_df = price_df.loc[:, price_df.isna().mean() <= max_missing].ffill().dropna()
+    tickers = price_df.columns.to_numpy()
+    prices = price_df.to_numpy(dtype=float)
+
+    # --- Correlation prefilter on log returns --- #
+    corr = np.corrcoef(np.diff(np.log(prices), axis=0), rowvar=False)
+    tasks = []
+    for i in range(len(tickers) - 1):
+        partners = np.flatnonzero(corr[i, i + 1:] >= min_corr) + i + 1
+        if len(partners):
+            tasks.append((i, partners, corr[i, partners]))
+    print(f"{sum(len(t[1]) for t in tasks)} of {len(tickers) * (len(tickers) - 1) // 2} pairs pass the correlation filter")
+
+    columns = ["x_idx", "y_idx", "corr", "hedge_ratio", "intercept", "adf_stat", "pvalue", "half_life"]
+    if not tasks:
+        return pd.DataFrame(columns=["x", "y"] + columns[2:])
+
+    # --- Test anchors in parallel over a shared copy of the panel --- #
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+    with SharedArray.create(prices) as shared:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shared.spec,)) as pool:
+            parts = list(pool.map(_scan_anchors, chunks, [lags] * len(chunks)))
+
+    results = pd.DataFrame({
+        name: np.concatenate([p[k] for p in parts if p is not None])
+        for k, name in enumerate(columns)
+    })
+    results.insert(0, "x", tickers[results.pop("x_idx").to_numpy()])
+    results.insert(1, "y", tickers[results.pop("y_idx").to_numpy()])
+    return results.sort_values("pvalue").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # Aligned (date x ticker) close panel, e.g. for the top liquid stocks
+    panel_path = sys.argv[1] if len(sys.argv) > 1 else PRICE_PANEL_PATH
+    price_df = read_artifact(Path(panel_path).with_suffix(".arrow"), index_col=0)
+
+    candidates = scan_cointegration(price_df)
+    filtered = candidates[candidates["pvalue"] < 0.05]
+
+    Path(COINTEGRATION_CANDIDATES_PATH).parent.mkdir(parents=True, exist_ok=True)
+    candidates.to_csv(COINTEGRATION_CANDIDATES_PATH, index=False)
+    filtered.to_csv(FILTERED_COINTEGRATION_CANDIDATES_PATH, index=False)
+    print(f"Saved {len(candidates)} candidates and {len(filtered)} cointegrated pairs (p < 0.05).")
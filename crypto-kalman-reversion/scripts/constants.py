@@ -27,8 +27,11 @@ current_dir = Path(__file__).resolve().parent.parent
 US_COMMON_STOCKS_PATH = current_dir / "data" / "us_common_stocks.csv"
 date_str = ENTRY_DATE.strftime("%Y-%m-%d")
 TOP_1500_LIQUID_STOCKS_PATH = f"../data/{date_str}/top_1500_liquid_stocks_{date_str}.csv"
+PRICE_PANEL_PATH = f"../data/{date_str}/price_panel_{date_str}.csv"
 COINTEGRATION_CANDIDATES_PATH = f"../data/{date_str}/cointegration_candidates_{date_str}.csv"
 FILTERED_COINTEGRATION_CANDIDATES_PATH = f"../data/{date_str}/filtered_cointegrated_pairs.csv"
 FINAL_CANDIDATES_PATH = f"../data/{date_str}/final_candidates_{date_str}.csv"
 TRADE_SIGNALS_PATH = f"../data/{date_str}/trade_signals_{date_str}.csv"
 BACKTEST_DATA_PATH = f"../data/{date_str}/backtest_data_{date_str}.csv"
+# Liquidity-filtered coin close panel written by filter_liquidity.py (Arrow, plus a CSV copy)
+TOP_LIQUID_COINS_PATH = f"../data/{ENTRY_DATE:%m-%d-%Y}/top_liquid_coins.arrow"
@@ -4,7 +4,8 @@ import matplotlib.pyplot as plt
 
 from ta.momentum import RSIIndicator
 
-def backtest_kalman_single_asset(price, Q, R, z_thresh, rsi_entry, stop_loss_pct=0.05, capital=5000, window_size=30, plot=True):
+def backtest_kalman_single_asset(price, Q, R, z_thresh, rsi_entry, stop_loss_pct=0.05, capital=5000, window_size=30, plot=True,
+                                 close_at_end=False):
     from ta.momentum import RSIIndicator
     import numpy as np
     import matplotlib.pyplot as plt
@@ -54,6 +55,14 @@ def backtest_kalman_single_asset(price, Q, R, z_thresh, rsi_entry, stop_loss_pct
                 dates.append(price.index[t])
                 position = 0
 
+    # Optionally close a position still open at the last bar, so the PnL covers every trade
+    if close_at_end and position > 0:
+        unrealized_pnl = (price.iloc[-1] - entry_price) * position
+        pnl.append(unrealized_pnl)
+        positions.append((entry_index, len(price) - 1, unrealized_pnl))
+        dates.append(price.index[-1])
+        position = 0
+
     # === Performance ===
     cumulative_pnl = np.cumsum(pnl)
     final_pnl = cumulative_pnl[-1] if len(cumulative_pnl) else 0
@@ -85,10 +94,11 @@ def backtest_kalman_single_asset(price, Q, R, z_thresh, rsi_entry, stop_loss_pct
     }
 
 # Run Grid Search for Parameter Optimization
-df = pd.read_csv(r"PATH", index_col=0, parse_dates=True)
-price_series = df["AVAX/USD"].dropna()
-results = backtest_kalman_single_asset(price_series, Q=0.0001, R=0.001, z_thresh=1, rsi_entry=30)
-print(results['sharpe'])
+if __name__ == "__main__":
+    df = pd.read_csv(r"PATH", index_col=0, parse_dates=True)
+    price_series = df["AVAX/USD"].dropna()
+    results = backtest_kalman_single_asset(price_series, Q=0.0001, R=0.001, z_thresh=1, rsi_entry=30)
+    print(results['sharpe'])
 
 """
 import itertools
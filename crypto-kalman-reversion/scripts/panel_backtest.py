@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from shared import read_artifact
+from constants import TOP_LIQUID_COINS_PATH
+
+"""
+Multi-asset panel backtest for the Kalman mean reversion strategy.
+
+Runs the same Kalman mean / spread z-score / RSI entry and mean-reversion or
+stop-loss exit rules as `backtest_kalman_single_asset`, but over every column
+of a price DataFrame at once. The Kalman filter, indicators and trade logic are
+evaluated with array operations across assets at each bar, and all assets draw
+from one shared pool of capital, so a 20-coin portfolio costs about as much to
+simulate as a single coin.
+"""
+
+
+# --- Indicators --- #
+def kalman_mean_panel(values, Q, R, P0=1.0):
+    """
+    Scalar Kalman mean for each column of a (time x asset) array.
+
+    Each asset's filter is seeded at its first valid price; missing prices
+    after that leave the mean and its variance unchanged.
+    """
+    n, m = values.shape
+    kf_mean = np.full((n, m), np.nan)
+    P = np.full(m, P0, dtype=float)
+    kf_mean[0] = values[0]
+
+    for t in range(1, n):
+        prev = kf_mean[t - 1]
+        p = values[t]
+        live = ~np.isnan(prev) & ~np.isnan(p)
+        seed = np.isnan(prev) & ~np.isnan(p)
+
+        P_pred = P + Q
+        K = P_pred / (P_pred + R)
+        kf_mean[t] = np.where(live, prev + K * (p - prev), np.where(seed, p, prev))
+        P = np.where(live, (1 - K) * P_pred, P)
+
+    return kf_mean
+
+
+def rsi_panel(prices, window=14):
+    """Wilder RSI for every column, matching ta.momentum.RSIIndicator(fillna=False)."""
+    diff = prices.diff(1)
+    valid = prices.notna()
+    up = diff.where(diff > 0, 0.0).where(valid)
+    down = -diff.where(diff < 0, 0.0).where(valid)
+    ema_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    ema_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    rsi = 100 - (100 / (1 + ema_up / ema_down))
+    return rsi.mask(ema_down == 0, 100.0)
+
+
+# --- Panel Backtest --- #
+def backtest_kalman_panel(prices, Q, R, z_thresh, rsi_entry, stop_loss_pct=0.05, capital=100000,
+                          capital_per_trade=None, window_size=30, periods_per_year=252, plot=True):
+    """
+    Backtest the Kalman/z-score/RSI strategy on every column of `prices`.
+
+    All assets share `capital`. Each entry commits `capital_per_trade` dollars
+    (default: an equal slice of capital per asset); when more assets signal than
+    there is free cash, the most oversold (lowest z-score) entries are filled
+    first. Exits are processed before entries on each bar, so released cash can
+    be reused immediately by other assets.
+    """
+    prices = prices.astype(float)
+    symbols = list(prices.columns)
+    values = prices.to_numpy()
+    marks = prices.ffill().to_numpy()
+    n, m = values.shape
+    if capital_per_trade is None:
+        capital_per_trade = capital / m
+
+    # === Indicators for all assets at once ===
+    kf_mean = kalman_mean_panel(values, Q, R)
+    spread = prices - kf_mean
+    spread_z = ((spread - spread.rolling(window_size).mean()) / spread.rolling(window_size).std()).to_numpy()
+    rsi = rsi_panel(prices, window=14).to_numpy()
+
+    # === Portfolio State ===
+    cash = float(capital)
+    qty = np.zeros(m)
+    entry_price = np.zeros(m)
+    entry_index = np.zeros(m, dtype=int)
+    capital_invested = np.zeros(m)
+    realized = np.zeros(m)
+    trade_count = np.zeros(m, dtype=int)
+    trade_log = []
+
+    equity = np.full(n, float(capital))
+    asset_pnl = np.zeros((n, m))
+
+    for t in range(window_size, n):
+        p = values[t]
+        has_price = ~np.isnan(p)
+        holding = qty > 0
+
+        # --- Exits: reversion to the Kalman mean or stop loss --- #
+        unrealized = (p - entry_price) * qty
+        stop_hit = -unrealized > capital_per_trade * stop_loss_pct
+        exits = holding & has_price & ((p > kf_mean[t]) | stop_hit)
+        if exits.any():
+            cash += np.sum(qty[exits] * p[exits])
+            realized[exits] += unrealized[exits]
+            trade_count[exits] += 1
+            for j in np.flatnonzero(exits):
+                trade_log.append((symbols[j], prices.index[entry_index[j]], prices.index[t], unrealized[j]))
+            qty[exits] = 0.0
+
+        # --- Entries: oversold assets that were flat coming into this bar --- #
+        signal = ~holding & has_price & (spread_z[t] < -z_thresh) & (rsi[t] < rsi_entry)
+        if signal.any():
+            candidates = np.flatnonzero(signal)
+            candidates = candidates[np.argsort(spread_z[t, candidates])]
+            affordable = int((cash + 1e-9) // capital_per_trade)
+            filled = candidates[:affordable]
+            qty[filled] = capital_per_trade / p[filled]
+            entry_price[filled] = p[filled]
+            entry_index[filled] = t
+            capital_invested[filled] += capital_per_trade
+            cash -= capital_per_trade * len(filled)
+
+        # --- Mark to market --- #
+        open_value = np.where(qty > 0, qty * marks[t], 0.0)
+        equity[t] = cash + open_value.sum()
+        asset_pnl[t] = realized + np.where(qty > 0, (marks[t] - entry_price) * qty, 0.0)
+
+    # === Performance ===
+    equity = pd.Series(equity, index=prices.index, name="equity")
+    asset_pnl = pd.DataFrame(asset_pnl, index=prices.index, columns=symbols)
+    bar_returns = equity.pct_change().dropna()
+    final_pnl = equity.iloc[-1] - capital
+    sharpe = 0
+    if bar_returns.std() > 0:
+        sharpe = (bar_returns.mean() / bar_returns.std()) * np.sqrt(periods_per_year)
+
+    per_asset = pd.DataFrame({
+        "final_pnl": realized,
+        "trades": trade_count,
+        "return_pct": np.divide(realized, capital_invested, out=np.zeros(m), where=capital_invested > 0) * 100,
+        "open_position": qty > 0
+    }, index=symbols)
+    trades = pd.DataFrame(trade_log, columns=["symbol", "entry_time", "exit_time", "pnl"])
+
+    # === Plot ===
+    if plot:
+        fig, axes = plt.subplots(2, 1, figsize=(14, 8), sharex=True)
+        axes[0].plot(equity.index, equity - capital, label="Portfolio PnL", color="purple")
+        axes[0].set_title("Portfolio Cumulative PnL")
+        axes[0].set_ylabel("PnL ($)")
+        axes[0].grid()
+        axes[0].legend()
+        for sym in symbols:
+            axes[1].plot(asset_pnl.index, asset_pnl[sym], label=sym, linewidth=1)
+        axes[1].set_title("Per-Asset Cumulative PnL")
+        axes[1].set_xlabel("Time")
+        axes[1].set_ylabel("PnL ($)")
+        axes[1].grid()
+        axes[1].legend(ncol=4, fontsize=8)
+        plt.tight_layout()
+        plt.show()
+
+    return {
+        "final_pnl": final_pnl,
+        "return_pct": final_pnl / capital * 100,
+        "sharpe": sharpe,
+        "trades": int(trade_count.sum()),
+        "equity_curve": equity,
+        "asset_pnl": asset_pnl,
+        "per_asset": per_asset,
+        "trade_log": trades
+    }
+
+
+if __name__ == "__main__":
+    # Run the strategy over every coin in the liquidity-filtered universe
+    # Memory-mapped Arrow read, falling back to the CSV copy
+    df = read_artifact(TOP_LIQUID_COINS_PATH, index_col=0)
+    results = backtest_kalman_panel(df, Q=0.0001, R=0.001, z_thresh=1, rsi_entry=30,
+                                    capital=5000 * df.shape[1])
+    print(f"Portfolio Sharpe: {results['sharpe']:.2f}")
+    print(f"Portfolio PnL: ${results['final_pnl']:,.2f} ({results['return_pct']:.2f}%)")
+    print(results["per_asset"].sort_values("final_pnl", ascending=False))
@@ -1,5 +1,4 @@
 import os
-import numpy as np
 import pandas as pd
 import time
 from ta.momentum import RSIIndicator
@@ -12,6 +11,7 @@ from alpaca.data.requests import CryptoLatestQuoteRequest
 import sys
 import requests
 import pandas as pd
+from shared import RollingStats
 
 
 # Accept symbol as command-line argument (preferred)
@@ -46,11 +46,19 @@ stop_loss_pct = 0.05
 z_thresh = 1.0
 rsi_entry = 30
 window_size = 30
+kalman_Q = 0.0001
+kalman_R = 0.01
 qty = None  # Will be computed based on capital
 
 # === Storage ===
 in_position = False
 entry_price = None
+
+# === Incremental Signal State (updated once per closed bar) ===
+kf_mean = None  # Kalman mean estimate
+kf_P = 1.0  # Kalman state variance
+spread_stats = RollingStats(window_size, ddof=1)  # ddof=1 to match pandas rolling std
+last_bar_time = None  # Open time of the last bar folded into the state
 def fetch_bars_from_binance(symbol="BTCUSDT", limit=1000):
     
     url = "https://api.binance.us/api/v3/klines"
@@ -75,22 +83,23 @@ def fetch_bars_from_binance(symbol="BTCUSDT", limit=1000):
 
 
 
-def apply_kalman(price):
-    n = len(price)
-    kf_mean = np.zeros(n)
-    P = 1.0
-    Q = 0.0001
-    R = 0.01
-    kf_mean[0] = price.iloc[0]
+def update_signal_state(price):
+    # Fold only bars newer than the last processed one into the Kalman mean and spread stats
+    global kf_mean, kf_P, last_bar_time
+    new_prices = price if last_bar_time is None else price[price.index > last_bar_time]
 
-    for t in range(1, n):
-        pred = kf_mean[t - 1]
-        P += Q
-        K = P / (P + R)
-        kf_mean[t] = pred + K * (price.iloc[t] - pred)
-        P = (1 - K) * P
+    for p in new_prices:
+        if kf_mean is None:
+            kf_mean = p
+        else:
+            kf_P += kalman_Q
+            K = kf_P / (kf_P + kalman_R)
+            kf_mean = kf_mean + K * (p - kf_mean)
+            kf_P = (1 - K) * kf_P
+        spread_stats.push(p - kf_mean)
 
-    return pd.Series(kf_mean, index=price.index)
+    if len(new_prices):
+        last_bar_time = new_prices.index[-1]
 
 from alpaca.data.live import CryptoDataStream
 
@@ -190,6 +199,8 @@ def run_strategy():
 
 
     bars = fetch_bars_from_binance(binance_symbol, limit=1000)
+    # Drop the still-forming candle so each bar updates the state exactly once
+    bars = bars[bars["_close_time"] < time.time() * 1000]
     closetime = bars["_close_time"].copy()
     price = bars["close"].dropna()
     
@@ -197,15 +208,12 @@ def run_strategy():
     if len(price) < window_size + 1:
         return
 
-    kalman_mean = apply_kalman(price)
-    kalman_mean = kalman_mean.reindex(price.index)  # Ensures same index
-
-    spread = price - kalman_mean
-    z_score = (spread - spread.rolling(window_size).mean()) / spread.rolling(window_size).std()
+    # Constant-time update of the Kalman mean and rolling spread z-score
+    update_signal_state(price)
     rsi = RSIIndicator(close=price, window=14).rsi()
 
     latest_price = price.iloc[-1]
-    latest_z = z_score.iloc[-1]
+    latest_z = spread_stats.zscore(latest_price - kf_mean)
     latest_rsi = rsi.iloc[-1]
 
     print(f"[{price.index[-1]}] Price: {latest_price:.2f}, Z: {latest_z:.2f}, RSI: {latest_rsi:.2f},Close Time: {closetime.iloc[-1]}")
@@ -220,7 +228,7 @@ def run_strategy():
         qty = float(position.qty)
         stop_loss_price = avg_entry * (1 - stop_loss_pct)
 
-        if latest_price > kalman_mean.iloc[-1] or latest_price < stop_loss_price:
+        if latest_price > kf_mean or latest_price < stop_loss_price:
             close_position(latest_price)
 
         # log live PnL
@@ -0,0 +1,24 @@
+import os
+import sys
+
+"""
+Modules shared with the other projects in this repository.
+
+passive-momentum/scripts and pairs-trading-kalman are not installed packages,
+so they are put on sys.path here, once, and the crypto scripts import what
+they use from this module:
+
+    from shared import read_artifact, write_artifact, RollingStats
+
+- read_artifact / write_artifact: typed Arrow artifact I/O (passive-momentum)
+- RollingStats: fixed-window rolling mean and std (pairs-trading-kalman)
+
+Neither shared module imports `constants`, so this project's constants are
+the ones the scripts see.
+"""
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.append(os.path.join(ROOT, "passive-momentum", "scripts"))
+sys.path.append(os.path.join(ROOT, "pairs-trading-kalman"))
+from artifact_io import read_artifact, write_artifact
+from rolling_stats import RollingStats
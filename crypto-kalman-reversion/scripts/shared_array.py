@@ -0,0 +1,54 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+"""
+Numpy arrays backed by named shared memory blocks.
+
+The parent process copies an array into shared memory once with
+`SharedArray.create`, hands the small `spec` tuple to worker processes, and
+each worker maps the same block with `SharedArray.attach` instead of receiving
+a pickled copy of the data with every task.
+"""
+
+
+class SharedArray:
+    def __init__(self, shm, shape, dtype, owner):
+        self.shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, array):
+        """Copy `array` into a new shared memory block owned by this process."""
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(shm, array.shape, array.dtype, owner=True)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """Map an existing block from its (name, shape, dtype) spec without copying."""
+        name, shape, dtype = spec
+        try:
+            # Only the creating process should unlink the block (Python 3.13+)
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, dtype, owner=False)
+
+    @property
+    def spec(self):
+        return (self.shm.name, self.array.shape, self.array.dtype.str)
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
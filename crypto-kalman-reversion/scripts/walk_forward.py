@@ -0,0 +1,151 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from mean_reversion import backtest_kalman_single_asset
+from shared_array import SharedArray
+from shared import read_artifact
+from constants import TOP_LIQUID_COINS_PATH
+
+"""
+Walk-forward optimization for the Kalman mean reversion strategy.
+
+The price series is split into rolling train/test folds. On each train fold the
+(Q, R, z_thresh, rsi_entry) grid is searched in-sample, and the best parameter
+set is then evaluated on the following, unseen test fold. Folds run in parallel
+worker processes that all read one copy of the price array from shared memory,
+so the whole out-of-sample study takes about as long as a single fold.
+"""
+
+
+# --- Default Parameter Grid (same ranges as the in-sample grid search) --- #
+PARAM_GRID = {
+    "Q": [1e-5, 1e-4, 1],
+    "R": [0.001, 0.01, 1],
+    "z_thresh": [0.8, 1.0, 1.2],
+    "rsi_entry": [30, 35, 40]
+}
+
+
+def make_folds(n, train_size, test_size, step=None):
+    """Rolling (train_start, test_start, test_end) index triples over n bars."""
+    step = step or test_size
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n:
+        folds.append((start, start + train_size, start + train_size + test_size))
+        start += step
+    return folds
+
+
+# --- Worker Process State --- #
+_worker = {}
+
+
+def _init_worker(spec):
+    # Map the shared price array once per worker process
+    _worker["prices"] = SharedArray.attach(spec)
+
+
+def _evaluate(prices, params, window_size, stop_loss_pct, capital, close_at_end=False):
+    Q, R, z_thresh, rsi_entry = params
+    return backtest_kalman_single_asset(
+        pd.Series(prices, copy=False),
+        Q=Q,
+        R=R,
+        z_thresh=z_thresh,
+        rsi_entry=rsi_entry,
+        stop_loss_pct=stop_loss_pct,
+        capital=capital,
+        window_size=window_size,
+        plot=False,
+        close_at_end=close_at_end
+    )
+
+
+def run_fold(fold, param_grid, metric="sharpe", window_size=30, stop_loss_pct=0.05, capital=5000):
+    """Grid search on the train slice, then score the winner on the test slice."""
+    train_start, test_start, test_end = fold
+    prices = _worker["prices"].array
+
+    # --- In-sample grid search --- #
+    best_params, best_train = None, None
+    for params in param_grid:
+        res = _evaluate(prices[train_start:test_start], params, window_size, stop_loss_pct, capital)
+        # NaN compares False against everything, so a non-finite score must never become the best
+        if not np.isfinite(res[metric]):
+            continue
+        if best_train is None or res[metric] > best_train[metric]:
+            best_params, best_train = params, res
+    if best_params is None:
+        # No parameter set scored a finite metric on this train fold; fall back to the first grid point
+        best_params = param_grid[0]
+        best_train = _evaluate(prices[train_start:test_start], best_params, window_size, stop_loss_pct, capital)
+
+    # --- Out-of-sample evaluation --- #
+    # Start window_size bars early so indicators are warm and trading begins at test_start;
+    # a position still open at the fold's last bar is closed there so the fold PnL is complete
+    warmup_start = max(test_start - window_size, 0)
+    test = _evaluate(prices[warmup_start:test_end], best_params, window_size, stop_loss_pct, capital,
+                     close_at_end=True)
+
+    Q, R, z_thresh, rsi_entry = best_params
+    return {
+        "train_start": train_start,
+        "test_start": test_start,
+        "test_end": test_end,
+        "Q": Q,
+        "R": R,
+        "z_thresh": z_thresh,
+        "rsi_entry": rsi_entry,
+        f"train_{metric}": best_train[metric],
+        "test_sharpe": test["sharpe"],
+        "test_return_pct": test["return_pct"],
+        "test_pnl": test["final_pnl"],
+        "test_trades": test["trades"]
+    }
+
+
+def walk_forward(price, train_size, test_size, step=None, param_grid=PARAM_GRID, metric="sharpe",
+                 window_size=30, stop_loss_pct=0.05, capital=5000, max_workers=None):
+    """
+    Run the walk-forward study on a price Series and return one row per fold.
+
+    `train_size`, `test_size` and `step` are in bars. `metric` is any key of the
+    backtest result used to pick the best train-fold parameters.
+    """
+    price = price.dropna()
+    folds = make_folds(len(price), train_size, test_size, step)
+    if not folds:
+        raise ValueError("Price series is too short for a single train/test fold")
+
+    grid = list(itertools.product(param_grid["Q"], param_grid["R"],
+                                  param_grid["z_thresh"], param_grid["rsi_entry"]))
+    max_workers = max_workers or min(len(folds), os.cpu_count() or 1)
+
+    with SharedArray.create(price.to_numpy(dtype=float)) as shared:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shared.spec,)) as pool:
+            futures = [
+                pool.submit(run_fold, fold, grid, metric, window_size, stop_loss_pct, capital)
+                for fold in folds
+            ]
+            rows = [f.result() for f in futures]
+
+    results = pd.DataFrame(rows)
+    results.insert(0, "test_from", price.index[results["test_start"]])
+    results.insert(1, "test_to", price.index[results["test_end"] - 1])
+    return results
+
+
+if __name__ == "__main__":
+    # Memory-mapped Arrow read, falling back to the CSV copy
+    df = read_artifact(TOP_LIQUID_COINS_PATH, columns=["AVAX/USD"], index_col=0)
+    price_series = df["AVAX/USD"].dropna()
+
+    # 60-bar train folds, each followed by a 20-bar out-of-sample test fold
+    wf = walk_forward(price_series, train_size=60, test_size=20)
+    print(wf.to_string(index=False))
+    print(f"\nOut-of-sample PnL: ${wf['test_pnl'].sum():,.2f} over {wf['test_trades'].sum()} trades")
+    print(f"Mean out-of-sample Sharpe: {wf['test_sharpe'].mean():.2f}")
@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+from rolling_garch import history_returns
+
+"""
+Batched AR(p)-GARCH(1,1) estimation over many rolling windows at once.
+
+Every forecast date's trailing return window is stacked into one
+(window x time) array, right-aligned so all windows end on the same step and
+shorter ones simply start later. The Gaussian log-likelihood and its analytic
+gradient are then evaluated for all windows together: the variance recursion
+and its derivative recursion advance in lockstep, one time step at a time,
+across every window. All windows' parameters are optimized together with
+a batched BFGS: each window keeps its own inverse Hessian and line search
+step, but every likelihood evaluation covers all windows still converging, so
+the Python overhead is paid once per step rather than once per window.
+
+The model matches arch_model(returns, mean='ARX', lags=p, vol='GARCH',
+p=1, q=1): the mean is regressed on the previous p returns (the first p
+returns only serve as lags), the variance recursion is started from arch's
+exponentially weighted backcast of the OLS residuals, and alpha + beta is kept
+below one. The parameters are optimized in an unconstrained form (log omega,
+logistic persistence and alpha share), so boundary optima such as alpha = 0
+are approached rather than hit exactly; arch's loose variance bounds are not
+applied.
+"""
+
+
+def stack_windows(close, dates, window=60, lags=5):
+    """Right-aligned returns, lag regressors and next-step regressors for every date with enough history."""
+    rows = []
+    for date in pd.DatetimeIndex(dates):
+        returns, last_price = history_returns(close, date, window)
+        if returns is not None and len(returns) > lags + 1:
+            rows.append((date, returns.to_numpy(dtype=float), last_price))
+
+    W = len(rows)
+    T = max((len(r) - lags for _, r, _ in rows), default=0)
+    Y = np.zeros((W, T))
+    X = np.zeros((W, T, lags + 1))
+    start = np.zeros(W, dtype=int)
+    X_next = np.zeros((W, lags + 1))
+    for w, (_, r, _) in enumerate(rows):
+        n = len(r) - lags
+        start[w] = T - n
+        Y[w, start[w]:] = r[lags:]
+        X[w, start[w]:, 0] = 1.0
+        for i in range(lags):
+            X[w, start[w]:, i + 1] = r[lags - 1 - i:len(r) - 1 - i]
+        X_next[w] = np.concatenate([[1.0], r[::-1][:lags]])
+    return {
+        "dates": pd.DatetimeIndex([d for d, _, _ in rows]),
+        "last_price": np.array([p for _, _, p in rows]),
+        "Y": Y, "X": X, "start": start, "X_next": X_next
+    }
+
+
+def _ols(Y, X, active):
+    # Per-window least squares mean parameters from the masked normal equations
+    Xm = X * active[:, :, None]
+    XtX = np.einsum("wti,wtj->wij", Xm, Xm)
+    XtY = np.einsum("wti,wt->wi", Xm, Y)
+    return np.linalg.solve(XtX, XtY[:, :, None])[:, :, 0]
+
+
+def _backcast(resids, start, tau=75):
+    # arch's backcast: exponentially weighted mean of the first (up to 75) squared residuals
+    W, T = resids.shape
+    steps = np.arange(T)[None, :] - start[:, None]
+    n_obs = T - start
+    weights = np.where((steps >= 0) & (steps < np.minimum(tau, n_obs)[:, None]), 0.94 ** np.maximum(steps, 0), 0.0)
+    return (weights * resids ** 2).sum(axis=1) / weights.sum(axis=1)
+
+
+def ar_garch_loglikelihood(params, Y, X, start, backcast):
+    """
+    Log-likelihood of each window and its gradient.
+
+    `params` is (window x [mu, phi_1..phi_p, omega, alpha, beta]). Returns
+    (loglik (W,), gradient (W, p + 4)).
+    """
+    W, T = Y.shape
+    n_mean = X.shape[2]
+    mean, omega, alpha, beta = params[:, :n_mean], params[:, n_mean], params[:, n_mean + 1], params[:, n_mean + 2]
+    eps = Y - np.einsum("wti,wi->wt", X, mean)
+
+    loglik = np.zeros(W)
+    grad = np.zeros((W, n_mean + 3))
+    s2 = np.zeros(W)
+    ds2 = np.zeros((W, n_mean + 3))  # d sigma2_t / d params
+    for t in range(T):
+        active = t >= start
+        first = t == start
+        e_prev = eps[:, t - 1] if t > 0 else np.zeros(W)
+        de_prev = -X[:, t - 1] if t > 0 else np.zeros((W, n_mean))
+
+        # --- Variance recursion and its derivative, all windows in lockstep --- #
+        new_ds2 = np.empty_like(ds2)
+        new_ds2[:, :n_mean] = 2 * alpha[:, None] * e_prev[:, None] * de_prev + beta[:, None] * ds2[:, :n_mean]
+        new_ds2[:, n_mean] = 1 + beta * ds2[:, n_mean]
+        new_ds2[:, n_mean + 1] = e_prev ** 2 + beta * ds2[:, n_mean + 1]
+        new_ds2[:, n_mean + 2] = s2 + beta * ds2[:, n_mean + 2]
+        start_ds2 = np.zeros_like(ds2)
+        start_ds2[:, n_mean] = 1.0
+        start_ds2[:, n_mean + 1] = backcast
+        start_ds2[:, n_mean + 2] = backcast
+        ds2 = np.where(first[:, None], start_ds2, new_ds2)
+        s2 = np.where(first, omega + (alpha + beta) * backcast, omega + alpha * e_prev ** 2 + beta * s2)
+
+        # --- Gaussian log-likelihood contribution --- #
+        e = eps[:, t]
+        loglik += np.where(active, -0.5 * (np.log(2 * np.pi) + np.log(s2) + e ** 2 / s2), 0.0)
+        g = -0.5 * (1 / s2 - e ** 2 / s2 ** 2)[:, None] * ds2
+        g[:, :n_mean] += (e / s2)[:, None] * X[:, t]  # -0.5 * 2e/s2 * d eps/d mean, with d eps = -X
+        grad += np.where(active[:, None], g, 0.0)
+    return loglik, grad
+
+
+# --- Unconstrained Parameterization --- #
+# omega = exp(a); persistence alpha + beta = MAX_PERSISTENCE * sigmoid(u); alpha's share of it = sigmoid(v)
+MAX_PERSISTENCE = 0.9999
+
+
+def _sigmoid(x):
+    return 0.5 * (1 + np.tanh(0.5 * x))  # logistic function without overflow
+
+
+def _to_natural(z, n_mean):
+    # Natural parameters from unconstrained ones, plus the partial derivatives of the chain rule
+    a, u, v = z[:, n_mean], z[:, n_mean + 1], z[:, n_mean + 2]
+    su, sv = _sigmoid(u), _sigmoid(v)
+    persistence = MAX_PERSISTENCE * su
+    omega, alpha = np.exp(a), persistence * sv
+    params = np.column_stack([z[:, :n_mean], omega, alpha, persistence - alpha])
+    dp_du = MAX_PERSISTENCE * su * (1 - su)
+    dalpha_dv = persistence * sv * (1 - sv)
+    return params, (omega, dp_du * sv, dp_du * (1 - sv), dalpha_dv)
+
+
+def _to_unconstrained(params, n_mean):
+    omega, alpha, beta = params[:, n_mean], params[:, n_mean + 1], params[:, n_mean + 2]
+    persistence = alpha + beta
+    logit = lambda p: np.log(p / (1 - p))
+    return np.column_stack([params[:, :n_mean], np.log(omega), logit(persistence / MAX_PERSISTENCE),
+                            logit(alpha / persistence)])
+
+
+def _batch_bfgs(objective, z0, maxiter=200, gtol=1e-6, ftol=1e-10):
+    """
+    Minimize W independent objectives at once with BFGS.
+
+    `objective(z, rows)` returns the values (len(rows),) and gradients
+    (len(rows), k) of the selected rows. Every window keeps its own inverse
+    Hessian and backtracking step; a window drops out once its gradient or
+    its decrease per iteration falls below tolerance.
+    """
+    z = z0.copy()
+    W, k = z.shape
+    rows = np.arange(W)
+    f, g = objective(z, rows)
+    H = np.tile(np.eye(k), (W, 1, 1))
+    first = np.ones(W, dtype=bool)
+    active = np.ones(W, dtype=bool)
+    for _ in range(maxiter):
+        active &= np.isfinite(f) & (np.abs(g).max(axis=1) > gtol)
+        if not active.any():
+            break
+        idx = rows[active]
+        d = -np.einsum("wij,wj->wi", H[idx], g[idx])
+        slope = (d * g[idx]).sum(axis=1)
+        # Fall back to steepest descent where the quasi-Newton direction is not a descent direction
+        uphill = slope >= 0
+        d[uphill] = -g[idx][uphill]
+        H[idx[uphill]] = np.eye(k)
+        slope[uphill] = -(g[idx][uphill] ** 2).sum(axis=1)
+
+        # --- Backtracking (Armijo) line search, halving each window's step until it decreases --- #
+        step = np.ones(len(idx))
+        accepted = np.zeros(len(idx), dtype=bool)
+        z_new, f_new, g_new = z[idx].copy(), f[idx].copy(), g[idx].copy()
+        for _ in range(20):
+            trial = np.flatnonzero(~accepted)
+            if len(trial) == 0:
+                break
+            z_trial = z[idx[trial]] + step[trial, None] * d[trial]
+            f_trial, g_trial = objective(z_trial, idx[trial])
+            ok = np.isfinite(f_trial) & (f_trial <= f[idx[trial]] + 1e-4 * step[trial] * slope[trial])
+            z_new[trial[ok]], f_new[trial[ok]], g_new[trial[ok]] = z_trial[ok], f_trial[ok], g_trial[ok]
+            accepted[trial[ok]] = True
+            step[trial[~ok]] *= 0.5
+        # No (meaningful) decrease along the direction: converged to working precision
+        active[idx[~accepted | (f[idx] - f_new <= ftol * (1 + np.abs(f_new)))]] = False
+
+        # --- Per-window BFGS update of the inverse Hessian --- #
+        s, y = z_new - z[idx], g_new - g[idx]
+        sy = (s * y).sum(axis=1)
+        update = accepted & (sy > 1e-12)
+        upd = idx[update]
+        s, y, sy = s[update], y[update], sy[update]
+        # Scale the initial identity to the curvature seen on the first step
+        scale = np.where(first[upd], sy / (y * y).sum(axis=1), 1.0)
+        Hs = H[upd] * scale[:, None, None]
+        rho = 1 / sy
+        V = np.eye(k) - rho[:, None, None] * np.einsum("wi,wj->wij", s, y)
+        H[upd] = np.einsum("wij,wjk,wlk->wil", V, Hs, V) + rho[:, None, None] * np.einsum("wi,wj->wij", s, s)
+        first[upd] = False
+        z[idx], f[idx], g[idx] = z_new, f_new, g_new
+    return z, f
+
+
+def fit_ar_garch_batch(Y, X, start, maxiter=200):
+    """Fit every window's AR-GARCH parameters together; returns (params (W, p + 4), loglik (W,))."""
+    W, T = Y.shape
+    n_mean = X.shape[2]
+    active = np.arange(T)[None, :] >= start[:, None]
+
+    # --- OLS mean, backcast and variance starting values --- #
+    mean = _ols(Y, X, active)
+    resids = np.where(active, Y - np.einsum("wti,wi->wt", X, mean), 0.0)
+    backcast = _backcast(resids, start)
+    variance = (resids ** 2).sum(axis=1) / active.sum(axis=1)
+    x0 = np.column_stack([mean, 0.1 * variance, np.full(W, 0.1), np.full(W, 0.8)])
+
+    def objective(z, rows):
+        # Trial steps can overflow omega; those evaluate to a non-finite value and are rejected
+        with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+            params, (domega, dalpha_du, dbeta_du, dalpha_dv) = _to_natural(z, n_mean)
+            loglik, grad = ar_garch_loglikelihood(params, Y[rows], X[rows], start[rows], backcast[rows])
+        g_omega, g_alpha, g_beta = grad[:, n_mean], grad[:, n_mean + 1], grad[:, n_mean + 2]
+        dz = np.column_stack([grad[:, :n_mean], g_omega * domega, g_alpha * dalpha_du + g_beta * dbeta_du,
+                              (g_alpha - g_beta) * dalpha_dv])
+        return -loglik, -dz
+
+    z, neg_loglik = _batch_bfgs(objective, _to_unconstrained(x0, n_mean), maxiter=maxiter)
+    return _to_natural(z, n_mean)[0], -neg_loglik
+
+
+def batch_ar_garch_forecast(close, dates, window=60, lags=5):
+    """Next-day price forecasts indexed by `dates`, like rolling_garch.rolling_ar_garch_forecast."""
+    dates = pd.DatetimeIndex(dates)
+    stacked = stack_windows(close.sort_index(), dates, window, lags)
+    forecasts = pd.Series(np.nan, index=dates, name="forecast")
+    if len(stacked["dates"]) == 0:
+        return forecasts
+    params, _ = fit_ar_garch_batch(stacked["Y"], stacked["X"], stacked["start"])
+    mean_forecast = np.einsum("wi,wi->w", stacked["X_next"], params[:, :lags + 1])
+    forecasts[stacked["dates"]] = stacked["last_price"] * (1 + mean_forecast / 100)
+    return forecasts
@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+from rolling_garch import rolling_ar_garch_forecast
+from batch_garch import batch_ar_garch_forecast
+from shared import FedFundsRates
+
+"""
+AR(5)-GARCH(1,1) forecast-and-trade strategy, importable by the single-stock
+script (ar-garch.py) and the multi-event study (inclusion_study.py).
+
+Each day the rolling AR-GARCH forecasts the next close; when the forecast
+deviates from the close by more than signal_threshold the strategy goes long
+or short at the next open, sized by a stop-loss risk budget and capped at 1%
+of 20-day ADV, and pays transaction and overnight financing costs.
+"""
+
+# --- Strategy Parameters ---
+fred_key = "MY FRED KEY"
+arima_window = 60  # lookback window for ARIMA-GARCH
+signal_threshold = 2.2  # signal strength threshold to enter trades
+portfolio_size = 5_000_000  # total capital allocated
+txn_cost_per_share = 0.01  # assumed cost per trade per share
+risk_per_trade = 0.01  # risk budget per trade (1% of portfolio)
+stop_loss_pct = 0.01  # maximum loss tolerated before exiting trade
+refit_every = 1  # refit the AR-GARCH every k days, filtering with fixed parameters in between
+forecast_workers = None  # processes for the rolling forecast (None: one per CPU)
+forecast_engine = "rolling"  # "rolling": one arch fit per day; "batch": all windows fitted together (batch_garch.py)
+simulation_mode = "vectorized"  # "vectorized": array PnL simulation; "loop": the day-by-day reference (same results)
+
+# --- Helper Functions ---
+
+# Fed Funds rate from FRED for calculating overnight costs, loaded once and cached locally
+fed_funds = FedFundsRates(fred_key)
+
+
+# --- Forecast Prices with ARIMA-GARCH Model ---
+def forecast_prices(full_df, price_df, max_workers=None):
+    """Rolling AR(5)-GARCH(1,1) next-day price forecast for each day of price_df (see rolling_garch.py)."""
+    if forecast_engine == "batch":
+        return batch_ar_garch_forecast(full_df["close"], price_df.index, window=arima_window, lags=5)
+    return rolling_ar_garch_forecast(full_df["close"], price_df.index, window=arima_window, lags=5,
+                                     refit_every=refit_every, warm_start=True,
+                                     max_workers=max_workers or forecast_workers)
+
+
+# --- Generate Trading Signals ---
+def generate_signals(price_df):
+    # Create long/short/neutral signals based on how far the forecast deviates from current price
+    signal_state = []
+    state = 0
+    for diff in price_df["signal_diff"]:
+        if diff > signal_threshold:
+            state = 1    # long signal
+        elif diff < -signal_threshold:
+            state = -1   # short signal
+        elif abs(diff) < 0.5:
+            state = 0    # exit signal
+        signal_state.append(state)
+
+    price_df["signal"] = signal_state
+    price_df["position"] = price_df["signal"].shift(1).fillna(0)  # trade the next day
+    return price_df
+
+
+# --- Backtest PnL Simulation with Position Sizing and Stop Loss ---
+def simulate_pnl(price_df, full_df):
+    # Track PnL, returns, and equity curve
+    pnl_list = []
+    return_pct_list = []
+    trade_pnl_list = []
+
+    cum_pnl = 0
+    entry_price = None
+    entry_idx = None
+    entry_pos = 0
+    shares = 0
+
+    # Fed Funds rate in effect on every simulated day, in one as-of lookup
+    fed_rates = fed_funds.rate(price_df.index)
+
+    # Simulate one trading day at a time
+    for i in range(1, len(price_df)):
+        today = price_df.index[i]
+        yest = price_df.index[i - 1]
+        pos = price_df.loc[yest, "position"]
+
+        # No position: no trade
+        if pos == 0:
+            pnl_list.append(0)
+            return_pct_list.append(0)
+            trade_pnl_list.append(0)
+            entry_price = None
+            entry_pos = 0
+            continue
+
+        # Retrieve price and volume info
+        open_price = price_df.loc[today, "open"]
+        close_price = price_df.loc[today, "close"]
+        volume = price_df.loc[today, "volume"]
+        adv = full_df["volume"].loc[:yest].tail(20).mean()  # 20-day ADV
+
+        if np.isnan(open_price) or np.isnan(close_price) or adv == 0:
+            pnl_list.append(0)
+            return_pct_list.append(0)
+            trade_pnl_list.append(0)
+            continue
+
+        # If new position, calculate position size based on stop loss constraint and liquidity cap
+        if entry_pos != pos:
+            entry_price = open_price
+            entry_idx = i
+            entry_pos = pos
+            max_shares = int(0.01 * adv)  # limit to 1% of ADV
+            shares = min(int(risk_per_trade * portfolio_size / (open_price * stop_loss_pct)), max_shares)
+
+        # Compute overnight cost for holding the position
+        fed_rate = fed_rates[i]
+        overnight_rate = fed_rate + (0.015 if pos > 0 else 0.01)
+        gross_position_value = shares * open_price
+        overnight_cost = gross_position_value * overnight_rate / 252  # annualized
+        txn_cost = shares * txn_cost_per_share
+
+        # Daily PnL from open to close (based on direction)
+        gross_pnl = (close_price - open_price) * shares * pos
+
+        # Apply stop loss: cap the loss and exit if breached
+        stop_loss_value = stop_loss_pct * entry_price * shares
+        current_loss = (close_price - entry_price) * shares * pos * -1
+
+        if current_loss > stop_loss_value:
+            gross_pnl = -stop_loss_value
+            pos = 0  # exit position
+
+        # Net PnL after all costs
+        net_pnl = gross_pnl - txn_cost - overnight_cost
+        return_pct = net_pnl / gross_position_value if gross_position_value > 0 else 0
+
+        pnl_list.append(net_pnl)
+        return_pct_list.append(return_pct)
+        trade_pnl_list.append(net_pnl)
+
+    # --- Finalize and Store Simulation Results ---
+    price_df = price_df.iloc[1:].copy()
+    price_df["net_pnl"] = pnl_list
+    price_df["return_pct"] = return_pct_list
+    price_df["equity"] = price_df["net_pnl"].cumsum()
+    return price_df
+
+
+# --- Vectorized PnL Simulation ---
+def simulate_pnl_vectorized(price_df, full_df):
+    """
+    simulate_pnl computed with array operations; the results are identical.
+
+    The only state the day loop carries is the open trade's direction, entry
+    price and size. It is reset on flat days, set when a tradable day's
+    position differs from it, and left alone on untradable days (missing
+    price or zero ADV), so it is a forward fill over the days. The stop loss
+    caps that day's PnL without changing the state, as in the loop. The
+    20-day ADV as of each day comes from one rolling mean over the history.
+    """
+    pos = price_df["position"].to_numpy(dtype=float)[:-1]  # yesterday's position, for each simulated day
+    open_price = price_df["open"].to_numpy(dtype=float)[1:]
+    close_price = price_df["close"].to_numpy(dtype=float)[1:]
+    adv = full_df["volume"].rolling(20, min_periods=1).mean().reindex(price_df.index).to_numpy()[:-1]
+    fed_rates = fed_funds.rate(price_df.index)[1:]
+
+    # --- Trade state: direction, entry price and shares, forward filled --- #
+    tradable = (pos != 0) & ~np.isnan(open_price) & ~np.isnan(close_price) & (adv != 0)
+    state = pd.Series(np.where(pos == 0, 0.0, np.where(tradable, pos, np.nan))).ffill().fillna(0.0)
+    new_entry = tradable & (state.shift(1, fill_value=0.0).to_numpy() != pos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entry_shares = np.minimum(np.trunc(risk_per_trade * portfolio_size / (open_price * stop_loss_pct)),
+                                  np.trunc(0.01 * adv))  # limit to 1% of ADV
+    entry_price = pd.Series(np.where(new_entry, open_price, np.nan)).ffill().to_numpy()
+    shares = pd.Series(np.where(new_entry, entry_shares, np.nan)).ffill().to_numpy()
+
+    # --- Costs, daily PnL and stop loss --- #
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overnight_rate = fed_rates + np.where(pos > 0, 0.015, 0.01)
+        gross_position_value = shares * open_price
+        overnight_cost = gross_position_value * overnight_rate / 252
+        txn_cost = shares * txn_cost_per_share
+        gross_pnl = (close_price - open_price) * shares * pos
+        stop_loss_value = stop_loss_pct * entry_price * shares
+        current_loss = (close_price - entry_price) * shares * pos * -1
+        gross_pnl = np.where(current_loss > stop_loss_value, -stop_loss_value, gross_pnl)
+        net_pnl = gross_pnl - txn_cost - overnight_cost
+        return_pct = np.where(gross_position_value > 0, net_pnl / gross_position_value, 0.0)
+
+    price_df = price_df.iloc[1:].copy()
+    price_df["net_pnl"] = np.where(tradable, net_pnl, 0.0)
+    price_df["return_pct"] = np.where(tradable, return_pct, 0.0)
+    price_df["equity"] = price_df["net_pnl"].cumsum()
+    return price_df
+
+
+# --- Full Strategy Run Over One Period ---
+def run_strategy(full_df, entry_date, end_date, max_workers=None):
+    """
+    Forecast, signal and simulate the strategy from entry_date to end_date.
+
+    `full_df` holds daily open/close/volume bars reaching far enough before
+    entry_date for the first forecast window (ar-garch.py fetches 180 days).
+    """
+    price_df = full_df.loc[entry_date:end_date].copy()
+    price_df["forecast"] = forecast_prices(full_df, price_df, max_workers)
+    price_df["signal_diff"] = price_df["forecast"] - price_df["close"]
+    price_df = generate_signals(price_df)
+    if simulation_mode == "loop":
+        return simulate_pnl(price_df, full_df)
+    return simulate_pnl_vectorized(price_df, full_df)
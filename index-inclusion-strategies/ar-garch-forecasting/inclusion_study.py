@@ -0,0 +1,134 @@
+import argparse
+import pandas as pd
+import numpy as np
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from shared import PolygonFetcher
+from garch_strategy import run_strategy, fed_funds
+
+"""
+AR-GARCH strategy over every index inclusion event.
+
+ar-garch.py runs the strategy on one stock (LULU) from one entry date. Here
+the same forecast-and-trade simulation (garch_strategy.py) runs for every
+event in the inclusion list read by momentum.py:
+
+- each ticker's bars are fetched once, concurrently, over the span covering
+  all of its events (plus the 180-day forecast history);
+- each event's simulation runs in its own worker process, with its AR-GARCH
+  fits in that process;
+- the per-event daily PnL is summed into one portfolio PnL series.
+
+    python inclusion_study.py --events polygon_announcement_to_trade_returns.csv
+"""
+
+# --- Study Configuration ---
+polygon_key = "MY POLYGON KEY"
+history_days = 180  # bars before each entry date used for the first forecast windows
+holding_days = 365  # simulate each event this many days forward, as ar-garch.py
+risked_capital = 50_000  # fixed risked capital for the Sharpe ratio, as ar-garch.py
+
+
+def load_events(path, date_column="Announced"):
+    """One row per (Ticker, entry_date, end_date) from the inclusion event list."""
+    events = pd.read_csv(path, parse_dates=["Announced", "Trade Date"])
+    events = events.drop_duplicates(subset=["Ticker", "Announced", "Trade Date"])
+    events = events.dropna(subset=["Ticker", date_column])
+    events = pd.DataFrame({"Ticker": events["Ticker"], "entry_date": events[date_column]})
+    events["end_date"] = events["entry_date"] + timedelta(days=holding_days)
+    return events.drop_duplicates().sort_values("entry_date").reset_index(drop=True)
+
+
+def prefetch_histories(fetcher, events):
+    """ticker -> daily open/close/volume bars over the span of all its events (None if the fetch failed)."""
+    spans = events.groupby("Ticker").agg(start=("entry_date", "min"), end=("end_date", "max"))
+    ranges = [(ticker, row.start - timedelta(days=history_days), row.end) for ticker, row in spans.iterrows()]
+    histories = {}
+    for (ticker, _, _), df in zip(ranges, fetcher.fetch_frames(ranges, progress=True)):
+        if isinstance(df, Exception) or df is None or df.empty:
+            print(f"Error fetching data for {ticker}: {df}")
+            histories[ticker] = None
+        else:
+            histories[ticker] = df[["open", "close", "volume"]].sort_index()
+    return histories
+
+
+def run_event(ticker, entry_date, end_date, full_df):
+    """Simulated strategy days (net_pnl, return_pct, ...) for one event, or None if it cannot run."""
+    try:
+        # One process per event already, so the forecast runs in this process
+        price_df = run_strategy(full_df, entry_date, end_date, max_workers=1)
+    except Exception as e:
+        print(f"Error simulating {ticker} from {entry_date:%Y-%m-%d}: {e}")
+        return None
+    return price_df if not price_df.empty else None
+
+
+def run_study(events, histories, max_workers=None):
+    """
+    Run every event and aggregate the results.
+
+    Returns a dict with the per-event summary, the long daily PnL table
+    (one row per event day) and the portfolio daily PnL and equity.
+    """
+    tasks = []
+    for event in events.itertuples(index=False):
+        history = histories.get(event.Ticker)
+        if history is None:
+            continue
+        full_df = history.loc[event.entry_date - timedelta(days=history_days):event.end_date]
+        if full_df.loc[event.entry_date:].empty:
+            continue
+        tasks.append((event.Ticker, event.entry_date, event.end_date, full_df))
+
+    # Load the Fed Funds series once here so the workers share it instead of each fetching it
+    fed_funds.load()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run_event, *task) for task in tasks]
+        results = [f.result() for f in futures]
+
+    summary, daily = [], []
+    for (ticker, entry_date, end_date, _), price_df in zip(tasks, results):
+        if price_df is None:
+            continue
+        summary.append({
+            "Ticker": ticker,
+            "Entry Date": entry_date.date(),
+            "End Date": end_date.date(),
+            "Net PnL $": price_df["net_pnl"].sum(),
+            "Trade Count": int((price_df["return_pct"] != 0).sum())
+        })
+        daily.append(pd.DataFrame({"Date": price_df.index, "Ticker": ticker, "Entry Date": entry_date.date(),
+                                   "Net PnL": price_df["net_pnl"].to_numpy()}))
+
+    daily = pd.concat(daily, ignore_index=True) if daily else pd.DataFrame(columns=["Date", "Ticker", "Entry Date", "Net PnL"])
+    portfolio = daily.groupby("Date")["Net PnL"].sum().sort_index().to_frame()
+    portfolio["Equity"] = portfolio["Net PnL"].cumsum()
+    return {"summary": pd.DataFrame(summary), "daily_pnl": daily, "portfolio": portfolio}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AR-GARCH strategy over every index inclusion event.")
+    parser.add_argument("--events", default="polygon_announcement_to_trade_returns.csv", help="inclusion event list")
+    parser.add_argument("--date-column", default="Announced", help='event column used as entry date ("Announced" or "Trade Date")')
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    events = load_events(args.events, args.date_column)
+    fetcher = PolygonFetcher(polygon_key)
+    histories = prefetch_histories(fetcher, events)
+    study = run_study(events, histories, max_workers=args.workers)
+
+    study["summary"].to_csv("garch_inclusion_events.csv", index=False)
+    study["daily_pnl"].to_csv("garch_inclusion_daily_pnl.csv", index=False)
+    study["portfolio"].to_csv("garch_inclusion_portfolio.csv")
+
+    # --- Performance Metrics ---
+    daily_returns = study["portfolio"]["Net PnL"] / risked_capital
+    risk_free = fed_funds.rate(daily_returns.index) / 252
+    std = daily_returns.std()
+    sharpe = (daily_returns - risk_free).mean() / std * np.sqrt(252) if std > 0 else np.nan
+    print(f"Events simulated: {len(study['summary'])} of {len(events)}")
+    print(f"Total Net PnL: ${study['portfolio']['Net PnL'].sum():,.2f}")
+    print(f"Sharpe Ratio: {sharpe:.2f}")
+    print(f"Trade Count: {study['summary']['Trade Count'].sum() if len(study['summary']) else 0}")
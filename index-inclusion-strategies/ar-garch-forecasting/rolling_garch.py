@@ -0,0 +1,94 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from arch import arch_model
+
+"""
+Rolling one-day-ahead AR(p)-GARCH(1,1) price forecasts.
+
+For every forecast date the model is fitted on the returns of the trailing
+window exactly as in ar-garch.py: closes from (date - 2 * window days) up to
+and including the date, at least `window` of them, forecasting the next
+day's close. Two things make the rolling fit cheap:
+
+- warm starts: each fit starts the optimizer from the previous day's
+  parameters, which are already close to the optimum of an overlapping
+  window, instead of arch's default starting values;
+- refit every k days: between refits the latest parameters are held fixed
+  and the model is only filtered forward over the new window to forecast.
+
+The forecast dates are split into contiguous chunks that run in parallel
+worker processes, each with its own warm-start chain (only the first fit of
+each chunk starts cold).
+
+On 60-day windows the GARCH likelihood is flat, so a warm start can settle in
+a slightly different optimum than a cold one (on average no worse in
+likelihood); warm_start=False with refit_every=1 reproduces the original
+per-day fits exactly.
+"""
+
+
+def history_returns(close, date, window=60):
+    """Percent returns of the trailing window used for the forecast made on `date` (None if too short)."""
+    history = close[:date]
+    history = history[history.index >= date - timedelta(days=window * 2)]
+    if len(history) < window:
+        return None, None
+    return 100 * history.pct_change().dropna(), history.iloc[-1]
+
+
+def forecast_chunk(close, dates, window=60, lags=5, refit_every=1, warm_start=True):
+    """Forecast price for each date in `dates`, fitting in order so each fit can warm start from the last."""
+    params = None
+    forecasts = []
+    for k, date in enumerate(dates):
+        returns, last_price = history_returns(close, date, window)
+        if returns is None:
+            forecasts.append(np.nan)
+            continue
+        try:
+            model = arch_model(returns, mean='ARX', lags=lags, vol='GARCH', p=1, q=1)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                if params is None or k % refit_every == 0:
+                    fit = model.fit(disp='off', starting_values=params if warm_start else None)
+                    params = fit.params.to_numpy()
+                else:
+                    # Between refits keep the last parameters and only filter the new window
+                    fit = model.fix(params)
+                mean_forecast = fit.forecast(horizon=1).mean.iloc[-1, 0]
+            forecasts.append(last_price * (1 + mean_forecast / 100))
+        except Exception:
+            forecasts.append(np.nan)
+    return forecasts
+
+
+def rolling_ar_garch_forecast(close, dates, window=60, lags=5, refit_every=1, warm_start=True,
+                              max_workers=None, chunk_size=None):
+    """
+    Series of next-day price forecasts indexed by `dates`.
+
+    `close` is the full daily close series (it must reach `window * 2` days
+    before the first date). With max_workers=1 everything runs in this
+    process as one warm-start chain.
+    """
+    close = close.sort_index()
+    dates = pd.DatetimeIndex(dates)
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = -(-len(dates) // max_workers)
+    # Chunks start on a refit day so every chunk opens with a full fit
+    chunk_size = max(refit_every, -(-chunk_size // refit_every) * refit_every)
+    chunks = [dates[i:i + chunk_size] for i in range(0, len(dates), chunk_size)]
+
+    args = (window, lags, refit_every, warm_start)
+    if max_workers == 1 or len(chunks) <= 1:
+        parts = [forecast_chunk(close, chunk, *args) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(forecast_chunk, close[:chunk[-1]], chunk, *args) for chunk in chunks]
+            parts = [f.result() for f in futures]
+    return pd.Series(np.concatenate(parts) if parts else [], index=dates, name="forecast", dtype=float)
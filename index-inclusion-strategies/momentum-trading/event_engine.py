@@ -0,0 +1,202 @@
+import heapq
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+"""
+Event-driven backtest of the index-inclusion momentum trades.
+
+momentum.py used to walk the trades one at a time: every trade fetched its
+ADV window, stock and hedge bars, ran to its exit and released its capital
+before the next trade was looked at, so trades that overlap in time never
+competed for capital. Here:
+
+- every stock and hedge ETF is fetched once, over the span covering all of
+  its trades, and each trade's ADV window and holding bars are slices of it;
+- each trade's sizing and daily mark-to-market path, including its stop
+  loss exit, are computed up front with array operations, since they do not
+  depend on the rest of the portfolio;
+- entries, daily marks and exits then run through one time-ordered priority
+  queue. On a given day entries come first (at the open), then marks and
+  exits (at the close), so a position holds its capital from entry to exit
+  and an exit frees capital for the following days' entries.
+
+Once realized losses reach the aggregate loss cap no new trades are entered;
+positions already open run to their own exits.
+"""
+
+ENTRY, MARK, EXIT = 0, 1, 2  # order of the events of one day
+
+
+def prefetch_bars(fetcher, trades):
+    """ticker -> daily open/close/volume bars covering every window its trades read (None if unavailable)."""
+    spans = pd.concat([
+        pd.DataFrame({"ticker": trades["Ticker"], "start": trades["Announced"] - timedelta(days=60),
+                      "end": trades["Trade Date"]}),
+        pd.DataFrame({"ticker": trades["Best Hedge"], "start": trades["Announced"] + timedelta(days=1),
+                      "end": trades["Trade Date"]})
+    ]).groupby("ticker").agg(start=("start", "min"), end=("end", "max"))
+    ranges = [(ticker, row.start, row.end) for ticker, row in spans.iterrows()]
+
+    bars = {}
+    for (ticker, _, _), df in zip(ranges, fetcher.fetch_frames(ranges, progress=True)):
+        if isinstance(df, Exception):
+            print(f"Error fetching data for {ticker}: {df}")
+            df = None
+        if df is None or df.empty:
+            bars[ticker] = None
+            continue
+        df = df[["open", "close", "volume"]].sort_index()
+        df.index = df.index.normalize()  # bar timestamps -> trading days, so date slices include both ends
+        bars[ticker] = df
+    return bars
+
+
+def plan_trade(trade, bars, portfolio_size=5_000_000, txn_cost_per_share=0.01, position_loss_cap=5_000):
+    """
+    Entry, daily marks and exit of one trade, as momentum.py sizes and stops it.
+
+    `trade` is one row of the trades table (Ticker, Best Hedge, Hedge Beta,
+    Return Z-Score, Announced, Trade Date, Fed Rate). Returns None for a trade
+    that is skipped before its capital check.
+    """
+    ticker, hedge, beta, zscore = trade["Ticker"], trade["Best Hedge"], trade["Hedge Beta"], trade["Return Z-Score"]
+    ann_date = trade["Announced"]
+    start = ann_date + timedelta(days=1)  # entry date
+    end = trade["Trade Date"]  # final allowed holding day
+    if pd.isna(zscore) or (end - start).days < 2:
+        return None
+    stock_bars, hedge_bars = bars.get(ticker), bars.get(hedge)
+    if stock_bars is None or hedge_bars is None:
+        return None
+
+    # --- ADV for sizing --- #
+    adv_data = stock_bars.loc[ann_date - timedelta(days=60):ann_date - timedelta(days=1)]
+    if len(adv_data) < 20:
+        return None
+    adv = adv_data["volume"].tail(20).mean()
+    if pd.isna(adv) or adv == 0:
+        return None
+    max_shares = int(0.01 * adv)
+
+    stock_data, hedge_data = stock_bars.loc[start:end], hedge_bars.loc[start:end]
+    if len(stock_data) < 2 or len(hedge_data) < 2:
+        return None
+    stock_open_date, hedge_open = stock_data.index[0], hedge_data["open"].iloc[0]
+    stock_open = stock_data["open"].iloc[0]
+
+    # --- Capital-aware position sizing (limit exposure to 5%) --- #
+    stock_shares = min(int((portfolio_size * 0.05) / stock_open), max_shares)
+    stock_entry = stock_shares * stock_open
+    hedge_dollars = abs(beta) * stock_entry
+    hedge_shares = min(int(hedge_dollars / hedge_open), max_shares, int((portfolio_size * 0.05) / hedge_open))
+    hedge_entry = hedge_shares * hedge_open
+
+    short_stock = zscore < -1
+    fed_rate = trade["Fed Rate"]
+    txn_cost = txn_cost_per_share * (stock_shares + hedge_shares)
+
+    def pnl(stock_close, hedge_close, hold_days):
+        # (gross, hedge, net) PnL of closing at these prices after hold_days calendar days
+        stock_exit, hedge_exit = stock_close * stock_shares, hedge_close * hedge_shares
+        hedge_pnl = -beta * (hedge_exit - hedge_entry)
+        gross = (stock_entry - stock_exit if short_stock else stock_exit - stock_entry) + hedge_pnl
+        overnight_cost = (stock_entry * (fed_rate + 0.015) + hedge_entry * (fed_rate + 0.01)) * (hold_days / 252)
+        return gross, hedge_pnl, gross - txn_cost - overnight_cost
+
+    # --- Daily marks on the days both legs trade; stop at the first breach of the position loss cap --- #
+    mark_dates = stock_data.index[stock_data.index.isin(hedge_data.index)]
+    marks = pnl(stock_data.loc[mark_dates, "close"].to_numpy(), hedge_data.loc[mark_dates, "close"].to_numpy(),
+                (mark_dates - stock_open_date).days.to_numpy())[2]
+    breaches = np.flatnonzero(marks <= -position_loss_cap)
+    stop_hit = len(breaches) > 0
+    if stop_hit:
+        mark_dates, marks = mark_dates[:breaches[0] + 1], marks[:breaches[0] + 1]
+        stock_close_date = hedge_close_date = mark_dates[-1]
+    else:
+        # If not stopped, exit at latest valid date
+        stock_close_date, hedge_close_date = stock_data.index[-1], hedge_data.index[-1]
+
+    hold_days = (stock_close_date - stock_open_date).days
+    gross_pnl, hedge_pnl, net_pnl = pnl(stock_data.loc[stock_close_date, "close"],
+                                        hedge_data.loc[hedge_close_date, "close"], hold_days)
+    capital = stock_entry + hedge_entry
+    direction = "SHORT" if short_stock else "LONG"
+    return {
+        "entry_date": stock_open_date,
+        "exit_date": max(stock_close_date, hedge_close_date),
+        "capital": capital,
+        "net_pnl": net_pnl,
+        "ticker": ticker,
+        "direction": direction,
+        "marks": pd.Series(marks, index=mark_dates),
+        "result": {
+            "Ticker": ticker,
+            "Hedge Ticker": hedge,
+            "Z-Score": zscore,
+            "Position": direction,
+            "Start Date": stock_open_date.date(),
+            "End Date": stock_close_date.date(),
+            "Gross PnL $": gross_pnl,
+            "Hedge PnL $": hedge_pnl,
+            "Net PnL $": net_pnl,
+            "Net PnL %": net_pnl / capital,
+            "Capital Used": capital,
+            "Days Held": hold_days,
+            "Stopped Early": stop_hit
+        }
+    }
+
+
+def run_event_queue(plans, portfolio_size=5_000_000, aggregate_loss_cap=100_000):
+    """
+    Run planned trades through one time-ordered queue of entries, daily marks and exits.
+
+    A trade is entered only if its capital fits next to the positions open at
+    that time. Returns a dict with the closed trades, the daily PnL records
+    of the entered trades, the capital in use after each event day and the
+    number of trades skipped for lack of capital.
+    """
+    queue = [(plan["entry_date"], ENTRY, i) for i, plan in enumerate(plans)]
+    heapq.heapify(queue)
+
+    capital_in_use = 0
+    realized_pnl = 0
+    halted = False
+    skipped = 0
+    results, daily_pnl_records, capital_records = [], [], {}
+    while queue:
+        date, kind, i = heapq.heappop(queue)
+        plan = plans[i]
+        if kind == ENTRY:
+            if halted:
+                continue
+            if capital_in_use + plan["capital"] > portfolio_size:
+                skipped += 1  # skip if not enough capital
+                continue
+            capital_in_use += plan["capital"]
+            for mark_date in plan["marks"].index:
+                heapq.heappush(queue, (mark_date, MARK, i))
+            heapq.heappush(queue, (plan["exit_date"], EXIT, i))
+        elif kind == MARK:
+            daily_pnl_records.append({
+                "Date": date.date(),
+                "Ticker": plan["ticker"],
+                "Position": plan["direction"],
+                "Net PnL": plan["marks"][date]
+            })
+        else:
+            capital_in_use -= plan["capital"]
+            realized_pnl += plan["net_pnl"]
+            results.append(plan["result"])
+            if realized_pnl <= -aggregate_loss_cap and not halted:
+                print(f"\nPortfolio stop loss hit on {date.date()}. No new entries.")
+                halted = True
+        capital_records[date] = capital_in_use
+
+    return {
+        "trades": pd.DataFrame(results),
+        "daily_pnl": pd.DataFrame(daily_pnl_records),
+        "capital_in_use": pd.Series(capital_records, name="capital_in_use", dtype=float),
+        "skipped_for_capital": skipped
+    }
@@ -0,0 +1,19 @@
+import os
+import sys
+
+"""
+Modules shared with the passive-momentum pipeline.
+
+passive-momentum/scripts is not an installed package, so it is put on
+sys.path here, once, and the strategy scripts import what they use from this
+module:
+
+    from shared import PolygonFetcher, FedFundsRates
+
+- PolygonFetcher: async, rate-limited Polygon aggregates fetcher
+- FedFundsRates: cached Fed Funds series looked up as of any dates
+"""
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "passive-momentum", "scripts"))
+from polygon_fetch import PolygonFetcher
+from fed_funds import FedFundsRates
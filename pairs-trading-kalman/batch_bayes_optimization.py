@@ -0,0 +1,186 @@
+import os
+import pickle
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from skopt import Optimizer
+from skopt.space import Real, Integer
+from kalman_hedge import filter_hedge_ratios
+
+"""
+Batch-parallel Bayesian optimization of the Kalman pairs parameters.
+
+Instead of one ask -> backtest -> tell round trip at a time, the optimizer
+proposes `batch_size` points per round (constant-liar strategy) and they are
+backtested concurrently in a process pool. The x/y price arrays are copied into
+shared memory once and mapped by each worker rather than pickled with every
+task. The optimizer state is saved after every batch so a long search can be
+stopped early (no improvement for `patience` batches) and resumed later.
+"""
+
+
+# --- Search Space (same as bayes-optimization-kalman.py) --- #
+search_space = [
+    Real(1e-6, 1e-2, prior='uniform', name='Q'),  # Process noise covariance
+    Real(1e-3, 1e-1, prior='uniform', name='R'),  # Measurement noise covariance
+    Integer(1e2, 1e4, name='P'),  # Initial covariance matrix (as an integer)
+]
+
+
+# --- Objective --- #
+def backtest_pnl(x, y, params):
+    """Total PnL of the spread reversion rule for one (Q, R, P) parameter set."""
+    Q, R, P = params  # Unpack the parameters for Kalman filter
+
+    # Hedge ratio (alpha) from the closed-form 2-state Kalman filter
+    alpha = filter_hedge_ratios(x, y, q=Q, r=R, p0=P)["alpha"]
+
+    # Track positions and PnL
+    position_x = 0
+    position_y = 0
+    pnl = []
+
+    # Trading loop
+    for t in range(1, len(alpha)):
+        # Spread and trading signals
+        spread = y[t] - (alpha[t] * x[t])
+
+        if position_x == 0 and position_y == 0:  # No open position
+            if spread > 1:  # Entry signal: spread is significantly above mean
+                position_x = -int(alpha[t])  # Short Asset X (JPM)
+                position_y = 1   # Long Asset Y (AAPL)
+                entry_price_x = x[t]
+                entry_price_y = y[t]
+            elif spread < -1:  # Entry signal: spread is significantly below mean
+                position_x = int(alpha[t])  # Long Asset X (JPM)
+                position_y = -1  # Short Asset Y (AAPL)
+                entry_price_x = x[t]
+                entry_price_y = y[t]
+        elif position_x > 0 and position_y == -1:  # Long X, Short Y
+            if spread < 0:  # Exit signal: spread has reverted to mean
+                pnl.append((x[t] - entry_price_x) * alpha[t] - (entry_price_y - y[t]) * alpha[t])
+                position_x = 0
+                position_y = 0
+        elif position_x < 0 and position_y == 1:  # Short X, Long Y
+            if spread > 0:  # Exit signal: spread has reverted to mean
+                pnl.append((entry_price_x - x[t]) * alpha[t] - (y[t] - entry_price_y) * alpha[t])
+                position_x = 0
+                position_y = 0
+
+    return np.sum(pnl)
+
+
+# --- Worker Process State --- #
+_worker = {}
+
+
+def _init_worker(shm_name, shape):
+    # Map the shared (2, n) price block once per worker process
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    _worker["shm"] = shm
+    _worker["xy"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _evaluate(params):
+    xy = _worker["xy"]
+    # The optimizer minimizes, so score each point by negative PnL
+    return -backtest_pnl(xy[0], xy[1], params)
+
+
+# --- Optimizer State --- #
+def make_optimizer(random_state=42):
+    return Optimizer(
+        dimensions=search_space,
+        acq_func='EI',
+        n_initial_points=5,
+        random_state=random_state
+    )
+
+
+def load_optimizer(state_path):
+    with open(state_path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_optimizer(opt, state_path):
+    # Write then rename so an interrupted save never corrupts the last state
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(opt, f)
+    os.replace(tmp_path, state_path)
+
+
+def run_batch_optimization(x, y, n_calls=500, batch_size=None, max_workers=None, patience=None,
+                           min_delta=0.0, state_path=None, random_state=42):
+    """
+    Evaluate up to `n_calls` points, `batch_size` at a time in parallel.
+
+    If `state_path` exists the search resumes from it, and evaluations already
+    recorded there count toward `n_calls`. With `patience` set, the search stops
+    once that many consecutive batches fail to improve the best PnL by more
+    than `min_delta`. Returns the optimizer.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    batch_size = batch_size or max_workers
+
+    if state_path and os.path.exists(state_path):
+        opt = load_optimizer(state_path)
+        print(f"Resuming from {state_path} with {len(opt.yi)} evaluations")
+    else:
+        opt = make_optimizer(random_state)
+
+    # --- Place x and y in shared memory once --- #
+    xy = np.vstack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+    shm = shared_memory.SharedMemory(create=True, size=xy.nbytes)
+    np.ndarray(xy.shape, dtype=np.float64, buffer=shm.buf)[...] = xy
+
+    best = min(opt.yi) if opt.yi else np.inf
+    stale_batches = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shm.name, xy.shape)) as pool:
+            while len(opt.yi) < n_calls:
+                k = min(batch_size, n_calls - len(opt.yi))
+                points = opt.ask(n_points=k)
+                scores = list(pool.map(_evaluate, points))
+                opt.tell(points, scores)
+                if state_path:
+                    save_optimizer(opt, state_path)
+
+                # --- Early stopping --- #
+                batch_best = min(scores)
+                if batch_best < best - min_delta:
+                    best = batch_best
+                    stale_batches = 0
+                else:
+                    stale_batches += 1
+                print(f"{len(opt.yi)}/{n_calls} evaluations, best PnL: {-best:.2f}")
+                if patience and stale_batches >= patience:
+                    print(f"No improvement in {patience} batches, stopping early.")
+                    break
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return opt
+
+
+if __name__ == "__main__":
+    import yfinance as yf
+
+    # Download 5-minute data for JPM and AAPL
+    tickers = ['JPM', 'AAPL']
+    data = yf.download(tickers, interval='5m', period='60d', progress=False)
+    data = data.between_time('09:30', '16:00')
+    close_prices = data['Close'].dropna()
+
+    x = close_prices['JPM'].values
+    y = close_prices['AAPL'].values
+
+    opt = run_batch_optimization(x, y, n_calls=500, patience=10, state_path="bayes_kalman_state.pkl")
+    best_idx = int(np.argmin(opt.yi))
+    print(f"Best Parameters: {opt.Xi[best_idx]}")
+    print(f"Best Performance (PnL): {-opt.yi[best_idx]}")
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+"""
+Batched Kalman filter for dynamic hedge ratios.
+
+Tracks the regression y_t = alpha_t * x_t + beta_t + e_t with state
+[alpha_t, beta_t] following a random walk. With a single observation per step
+the innovation variance S is a scalar, so the whole update is done in closed
+form on the three unique entries of the 2x2 state covariance: no matrix
+allocations and no np.linalg.inv. Every quantity is an array over a batch of
+filters (pairs and/or parameter sets stacked as columns), so hundreds of pairs
+are filtered with one pass over time.
+"""
+
+
+class HedgeRatioKalman:
+    """
+    Incremental two-state regression Kalman filter over a batch of series.
+
+    q, r and p0 are the process noise variance, measurement noise variance and
+    initial state variance (all diagonal); each may be a scalar or an array
+    broadcastable to `shape`, so each filter in the batch can have its own
+    parameters.
+    """
+
+    def __init__(self, q, r, p0, shape=(), alpha0=0.0, beta0=0.0):
+        self.shape = shape
+        self.q = np.broadcast_to(np.asarray(q, dtype=float), shape).copy()
+        self.r = np.broadcast_to(np.asarray(r, dtype=float), shape).copy()
+        self.alpha = np.full(shape, alpha0, dtype=float)
+        self.beta = np.full(shape, beta0, dtype=float)
+        # Unique entries of the symmetric state covariance [[p00, p01], [p01, p11]]
+        self.p00 = np.broadcast_to(np.asarray(p0, dtype=float), shape).copy()
+        self.p01 = np.zeros(shape)
+        self.p11 = self.p00.copy()
+
+    def update(self, x, y):
+        """
+        Predict and correct with one observation (x, y) per filter.
+
+        Filters whose x or y is NaN are left untouched for this step. Returns
+        the innovation y - (alpha x + beta) and its variance S, both measured
+        against the predicted state.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = np.isfinite(x) & np.isfinite(y)
+
+        # --- Predict: random walk state, P += Q --- #
+        p00 = self.p00 + self.q
+        p01 = self.p01
+        p11 = self.p11 + self.q
+
+        # --- Innovation and its scalar variance S = H P H' + R, H = [x, 1] --- #
+        innovation = y - (self.alpha * x + self.beta)
+        ph0 = p00 * x + p01
+        ph1 = p01 * x + p11
+        s = x * ph0 + ph1 + self.r
+
+        # --- Gain K = P H' / S and correction --- #
+        k0 = ph0 / s
+        k1 = ph1 / s
+        if valid.all():
+            self.alpha = self.alpha + k0 * innovation
+            self.beta = self.beta + k1 * innovation
+            self.p00 = p00 - k0 * ph0
+            self.p01 = p01 - k0 * ph1
+            self.p11 = p11 - k1 * ph1
+        else:
+            self.alpha = np.where(valid, self.alpha + k0 * innovation, self.alpha)
+            self.beta = np.where(valid, self.beta + k1 * innovation, self.beta)
+            self.p00 = np.where(valid, p00 - k0 * ph0, self.p00)
+            self.p01 = np.where(valid, p01 - k0 * ph1, self.p01)
+            self.p11 = np.where(valid, p11 - k1 * ph1, self.p11)
+        return innovation, s
+
+
+def filter_hedge_ratios(x, y, q, r, p0):
+    """
+    Run the hedge ratio filter over whole (time,) or (time, batch) arrays.
+
+    Returns a dict of arrays shaped like x: the filtered hedge ratio `alpha`,
+    intercept `beta`, the post-update `spread` y - alpha x used for trading, and
+    the one-step `innovation` and its variance `innovation_var`.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    kf = HedgeRatioKalman(q, r, p0, shape=x.shape[1:])
+
+    alpha = np.empty_like(x)
+    beta = np.empty_like(x)
+    innovation = np.empty_like(x)
+    innovation_var = np.empty_like(x)
+    for t in range(len(x)):
+        innovation[t], innovation_var[t] = kf.update(x[t], y[t])
+        alpha[t] = kf.alpha
+        beta[t] = kf.beta
+
+    return {
+        "alpha": alpha,
+        "beta": beta,
+        "spread": y - alpha * x,
+        "innovation": innovation,
+        "innovation_var": innovation_var
+    }
+
+
+def build_batch(prices, pairs, param_sets):
+    """
+    Stack every (pair, parameter set) combination as columns of one batch.
+
+    `prices` is a (time x ticker) DataFrame, `pairs` a list of (x_ticker,
+    y_ticker) tuples and `param_sets` a list of (Q, R, P) tuples. Returns the
+    x and y arrays, the per-column q, r and p0 arrays, and a MultiIndex that
+    labels each column.
+    """
+    x_cols = [x for x, _ in pairs for _ in param_sets]
+    y_cols = [y for _, y in pairs for _ in param_sets]
+    params = np.array([p for _ in pairs for p in param_sets], dtype=float).reshape(-1, 3)
+    labels = pd.MultiIndex.from_tuples(
+        [(x, y, Q, R, P) for x, y in pairs for Q, R, P in param_sets],
+        names=["x", "y", "Q", "R", "P"]
+    )
+    return {
+        "x": prices[x_cols].to_numpy(dtype=float),
+        "y": prices[y_cols].to_numpy(dtype=float),
+        "q": params[:, 0],
+        "r": params[:, 1],
+        "p0": params[:, 2],
+        "labels": labels
+    }
@@ -0,0 +1,247 @@
+import sys
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+from kalman_hedge import HedgeRatioKalman
+from rolling_stats import RollingStats
+
+"""
+Live streaming mode for the Kalman pairs strategy.
+
+The hedge ratio Kalman state and the rolling spread statistics stay in memory
+and are updated incrementally, one bar at a time, so every bar costs the same
+small, bounded amount of work. Bars for the two legs are fed independently as
+(symbol, timestamp, close) events and may arrive out of step: the strategy
+steps once per timestamp when both legs have reported it, carries a missing
+leg's last close forward when the other leg has already moved past it, and
+forces a step if one leg falls `max_pending` bars behind (once the lagging
+leg has a close to carry). Every timestamp is stepped at most once: a bar
+that arrives for a timestamp already stepped only refreshes its leg's carried
+close.
+
+The same `LivePairsStrategy` is driven by a local bar-replay source for
+testing and backtesting, and by a polling yfinance source when running live.
+"""
+
+
+class LivePairsStrategy:
+    """
+    Incremental Kalman pairs strategy emitting target positions per bar.
+
+    x is the hedge leg (JPM in the original study) and y the other leg (AAPL).
+    Entry, exit and stop-loss rules are the same as pairs-trading-kalman.py.
+    """
+
+    def __init__(self, x_symbol, y_symbol, Q=1e-3, R=1e-2, P=1e3, window_size=20,
+                 entry_z=1.0, stop_loss_threshold=1000, max_pending=3):
+        self.x_symbol = x_symbol
+        self.y_symbol = y_symbol
+        self.kf = HedgeRatioKalman(Q, R, P)
+        self.spread_stats = RollingStats(window_size)
+        self.entry_z = entry_z
+        self.stop_loss_threshold = stop_loss_threshold
+        self.max_pending = max_pending
+
+        # --- Bar alignment --- #
+        self.pending = {x_symbol: deque(), y_symbol: deque()}
+        self.last_close = {x_symbol: None, y_symbol: None}
+        self.last_bar = {x_symbol: None, y_symbol: None}  # timestamp of each leg's last_close
+        self.last_step = None  # latest timestamp already stepped
+        self.bars_seen = 0
+
+        # --- Trading state --- #
+        self.position_x = 0
+        self.position_y = 0
+        self.entry_price_x = None
+        self.entry_price_y = None
+        self.entry_time = None
+        self.trades = []
+
+    # --- Event Input --- #
+    def on_bar(self, symbol, timestamp, close):
+        """Queue one leg's bar and return the signals for any timestamps now complete."""
+        timestamp, close = pd.Timestamp(timestamp), float(close)
+        if self.last_step is not None and timestamp <= self.last_step:
+            # Late bar for a timestamp already stepped: carry it forward if it is newer than the
+            # leg's last close, but never step that timestamp again
+            if self.last_bar[symbol] is None or timestamp > self.last_bar[symbol]:
+                self.last_bar[symbol], self.last_close[symbol] = timestamp, close
+            return []
+
+        # Keep each leg's queue in timestamp order; a repeated bar replaces the queued one
+        queue = self.pending[symbol]
+        i = len(queue)
+        while i and queue[i - 1][0] > timestamp:
+            i -= 1
+        if i and queue[i - 1][0] == timestamp:
+            queue[i - 1] = (timestamp, close)
+        else:
+            queue.insert(i, (timestamp, close))
+        return self._drain()
+
+    def flush(self):
+        """Step through every queued bar, carrying stale legs forward."""
+        return self._drain(force=True)
+
+    def _drain(self, force=False):
+        signals = []
+        qx = self.pending[self.x_symbol]
+        qy = self.pending[self.y_symbol]
+        while qx or qy:
+            if qx and qy:
+                ts = min(qx[0][0], qy[0][0])
+            else:
+                # One leg has stalled: step the other leg against the stalled leg's last close,
+                # but leave the bars queued until the stalled leg has reported at least once
+                queue, stalled = (qx, self.y_symbol) if qx else (qy, self.x_symbol)
+                if not (force or len(queue) > self.max_pending) or self.last_close[stalled] is None:
+                    break
+                ts = queue[0][0]
+
+            for symbol, queue in ((self.x_symbol, qx), (self.y_symbol, qy)):
+                if queue and queue[0][0] == ts:
+                    self.last_bar[symbol], self.last_close[symbol] = queue.popleft()
+            self.last_step = ts
+
+            x = self.last_close[self.x_symbol]
+            y = self.last_close[self.y_symbol]
+            if x is None or y is None:
+                continue  # The other leg's feed started after ts; its close only seeds the carry
+            signals.append(self.step(ts, x, y))
+        return signals
+
+    # --- Strategy Step --- #
+    def step(self, timestamp, x, y):
+        """Update the filter and spread statistics with one aligned bar and trade on it."""
+        start = time.perf_counter_ns()
+        self.kf.update(x, y)
+        alpha = float(self.kf.alpha)
+        self.bars_seen += 1
+
+        spread = y - alpha * x
+        z_score = np.nan
+        event = None
+        if self.bars_seen > 1:  # The first bar only seeds the filter
+            self.spread_stats.push(spread)
+            z_score = (spread - self.spread_stats.mean) / self.spread_stats.std
+            event = self._trade(timestamp, x, y, alpha, z_score)
+
+        return {
+            "timestamp": timestamp,
+            "x": x,
+            "y": y,
+            "alpha": alpha,
+            "spread": spread,
+            "z_score": z_score,
+            "target_x": self.position_x,
+            "target_y": self.position_y,
+            "event": event,
+            "latency_us": (time.perf_counter_ns() - start) / 1000
+        }
+
+    def _trade(self, timestamp, x, y, alpha, z_score):
+        if self.position_x == 0 and self.position_y == 0:  # No open position
+            if z_score > self.entry_z:  # Short X, long Y
+                self._open(timestamp, -alpha, 1, x, y)
+                return "enter short x / long y"
+            if z_score < -self.entry_z:  # Long X, short Y
+                self._open(timestamp, alpha, -1, x, y)
+                return "enter long x / short y"
+        elif self.position_x > 0 and self.position_y == -1:  # Long X, short Y
+            unrealized_loss = abs(self.position_x) * (x - self.entry_price_x) + abs(self.position_y) * (y - self.entry_price_y)
+            if unrealized_loss > self.stop_loss_threshold:
+                return self._close(timestamp, -unrealized_loss, "stop loss")
+            if z_score > 0:  # Spread has reverted to mean
+                return self._close(timestamp, (x - self.entry_price_x) * alpha - (self.entry_price_y - y) * alpha, "exit")
+        elif self.position_x < 0 and self.position_y == 1:  # Short X, long Y
+            unrealized_loss = abs(self.position_x) * (self.entry_price_x - x) + abs(self.position_y) * (y - self.entry_price_y)
+            if unrealized_loss > self.stop_loss_threshold:
+                return self._close(timestamp, -unrealized_loss, "stop loss")
+            if z_score < 0:  # Spread has reverted to mean
+                return self._close(timestamp, (self.entry_price_x - x) * alpha - (y - self.entry_price_y) * alpha, "exit")
+        return None
+
+    def _open(self, timestamp, position_x, position_y, x, y):
+        self.position_x = position_x
+        self.position_y = position_y
+        self.entry_price_x = x
+        self.entry_price_y = y
+        self.entry_time = timestamp
+
+    def _close(self, timestamp, pnl, event):
+        self.trades.append((self.entry_time, timestamp, event, pnl))
+        self.position_x = 0
+        self.position_y = 0
+        self.entry_price_x = None
+        self.entry_price_y = None
+        self.entry_time = None
+        return event
+
+
+# --- Bar Sources --- #
+def replay_bars(close_prices, symbols=None):
+    """
+    Replay a (timestamp x symbol) close DataFrame as per-leg bar events.
+
+    NaN closes are skipped, so a leg with a missing bar arrives out of step
+    with the other, exactly as it would from a live feed.
+    """
+    symbols = symbols or list(close_prices.columns)
+    for ts, row in close_prices[symbols].iterrows():
+        for symbol in symbols:
+            if pd.notna(row[symbol]):
+                yield symbol, ts, row[symbol]
+
+
+def replay_csv(path):
+    """Replay recorded bars from a CSV with timestamp, symbol and close columns."""
+    bars = pd.read_csv(path, parse_dates=["timestamp"]).sort_values("timestamp", kind="stable")
+    for bar in bars.itertuples(index=False):
+        yield bar.symbol, bar.timestamp, bar.close
+
+
+def poll_yfinance(symbols, interval="5m", poll_seconds=60):
+    """Poll yfinance and yield each leg's newly completed bars as they appear."""
+    import yfinance as yf
+
+    last_seen = {s: None for s in symbols}
+    while True:
+        data = yf.download(symbols, interval=interval, period="1d", progress=False)["Close"]
+        # The last row is the bar still forming, so only emit the ones before it
+        for ts, row in data.iloc[:-1].iterrows():
+            for symbol in symbols:
+                if pd.notna(row[symbol]) and (last_seen[symbol] is None or ts > last_seen[symbol]):
+                    last_seen[symbol] = ts
+                    yield symbol, ts, row[symbol]
+        time.sleep(poll_seconds)
+
+
+def run(strategy, source, on_signal=None):
+    """Drive the strategy from any (symbol, timestamp, close) source and collect its signals."""
+    signals = []
+    for symbol, ts, close in source:
+        for signal in strategy.on_bar(symbol, ts, close):
+            signals.append(signal)
+            if on_signal is not None:
+                on_signal(signal)
+    signals.extend(strategy.flush())
+    return pd.DataFrame(signals)
+
+
+def print_signal(signal):
+    if signal["event"]:
+        print(f"[{signal['timestamp']}] {signal['event']}: target x={signal['target_x']:.2f}, "
+              f"y={signal['target_y']}, z={signal['z_score']:.2f} ({signal['latency_us']:.0f} us)")
+
+
+if __name__ == "__main__":
+    strategy = LivePairsStrategy("JPM", "AAPL")
+    if len(sys.argv) > 1:
+        # Replay recorded bars: python live_pairs.py bars.csv
+        signals = run(strategy, replay_csv(sys.argv[1]), on_signal=print_signal)
+        print(f"Replayed {len(signals)} bars, {len(strategy.trades)} trades, "
+              f"PnL = {sum(t[3] for t in strategy.trades):.2f}, "
+              f"max step latency = {signals['latency_us'].max():.0f} us")
+    else:
+        run(strategy, poll_yfinance(["JPM", "AAPL"]), on_signal=print_signal)
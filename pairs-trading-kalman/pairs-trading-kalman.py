@@ -2,6 +2,8 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 import matplotlib.pyplot as plt
+from kalman_hedge import filter_hedge_ratios
+from rolling_stats import RollingStats
 
 # Download 5-minute data for JPM and AAPL
 tickers = ['JPM', 'AAPL']
@@ -21,11 +23,12 @@ if len(x) != len(y):
     y = y[:min_len]
 
 # Initialize Kalman filter parameters
-alpha = np.zeros(n)  # Hedge ratio (alpha)
-P = np.eye(2) * 1e3  # Initial state covariance
-Q = np.eye(2) * 1e-3  # Process noise covariance
-R = np.array([[1e-2]])  # Measurement noise covariance
-H = np.array([[x[0], 1]])  # Measurement matrix
+P = 1e3  # Initial state covariance (diagonal)
+Q = 1e-3  # Process noise covariance (diagonal)
+R = 1e-2  # Measurement noise covariance
+
+# Filter the hedge ratio over the whole series (closed-form 2-state update)
+alpha = filter_hedge_ratios(x, y, q=Q, r=R, p0=P)["alpha"]
 
 # Initialize trading variables
 entry_price_x = None  # Entry price for Asset X
@@ -46,36 +49,17 @@ stop_loss_threshold = portfolio_size * 0.02  # 2% stop-loss = $1000
 
 # Define rolling window size for z-score calculation (e.g., 20 periods)
 window_size = 20
-spread_history = []
-
-# Kalman filter loop
-for t in range(1, n):
-    # Prediction step
-    x_pred = np.array([alpha[t-1], 0])  # Predicted state
-    P_pred = P + Q
-
-    # Measurement update step
-    y_t = y[t]
-    innovation = y_t - H @ x_pred
-    S = H @ P_pred @ H.T + R
-    K = P_pred @ H.T @ np.linalg.inv(S)
-    x_upd = x_pred + K @ innovation
-    P = P_pred - K @ H @ P_pred
-
-    # Update estimates
-    alpha[t] = x_upd[0]
+spread_stats = RollingStats(window_size)  # O(1) fixed-window mean / std of the spread
 
+# Trading loop
+for t in range(1, len(alpha)):
     # Define spread and update history
-    spread = y_t - (alpha[t] * x[t])
-    spread_history.append(spread)
-
-    # Calculate rolling mean and standard deviation for z-score
-    if len(spread_history) >= window_size:
-        rolling_mean = np.mean(spread_history[-window_size:])
-        rolling_std = np.std(spread_history[-window_size:])
-    else:
-        rolling_mean = np.mean(spread_history)
-        rolling_std = np.std(spread_history)
+    spread = y[t] - (alpha[t] * x[t])
+    spread_stats.push(spread)
+
+    # Rolling mean and standard deviation for z-score (all history until the window fills)
+    rolling_mean = spread_stats.mean
+    rolling_std = spread_stats.std
 
     # Calculate z-score
     z_score = (spread - rolling_mean) / rolling_std
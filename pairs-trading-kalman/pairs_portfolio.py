@@ -0,0 +1,172 @@
+import sys
+import numpy as np
+import pandas as pd
+from kalman_hedge import HedgeRatioKalman
+from rolling_stats import RollingStats
+
+"""
+Multi-pair portfolio backtester for the Kalman pairs strategy.
+
+Many pairs are simulated together on a common timestamp index. At each bar the
+hedge ratio filters, rolling spread statistics, stop-loss checks, exits and
+entries for every pair are evaluated as array operations across the whole book,
+so the per-bar cost barely depends on the number of pairs.
+
+Capital is shared: each open pair commits a fixed gross notional of
+capital / max_open_pairs, split between the legs in the hedge ratio. When more
+pairs signal than there are free slots, the largest |z| signals are filled
+first. Each pair has its own stop loss as a fraction of its notional, and an
+optional portfolio-level drawdown stop flattens the book. Positions are marked
+to market on every bar, giving a combined equity curve and per-pair PnL
+attribution.
+"""
+
+
+def backtest_pairs_portfolio(prices, pairs, Q=1e-3, R=1e-2, P=1e3, window_size=20, entry_z=1.0,
+                             capital=1_000_000, max_open_pairs=20, stop_loss_pct=0.02,
+                             portfolio_stop_pct=None, periods_per_year=252 * 78):
+    """
+    Backtest every (x, y) pair in `pairs` over a (timestamp x ticker) close panel.
+
+    Entry and exit directions follow pairs-trading-kalman.py: z above `entry_z`
+    goes long y / short alpha * x, z below -`entry_z` goes short y / long
+    alpha * x, and positions close when z crosses back through zero. Q, R and
+    P can be scalars or one value per pair.
+    """
+    tickers = sorted({t for pair in pairs for t in pair})
+    prices = prices[tickers].ffill().dropna()  # common index where every leg has a price
+    X = prices[[x for x, _ in pairs]].to_numpy(dtype=float)
+    Y = prices[[y for _, y in pairs]].to_numpy(dtype=float)
+    n, m = X.shape
+    labels = [f"{y}/{x}" for x, y in pairs]
+
+    kf = HedgeRatioKalman(Q, R, P, shape=(m,))
+    spread_stats = RollingStats(window_size, shape=(m,))
+    notional = capital / max_open_pairs
+
+    # --- Book state (one entry per pair) --- #
+    side = np.zeros(m)  # +1 long y / short x, -1 short y / long x, 0 flat
+    qty_x = np.zeros(m)
+    qty_y = np.zeros(m)
+    entry_x = np.zeros(m)
+    entry_y = np.zeros(m)
+    entry_t = np.zeros(m, dtype=int)
+    realized = np.zeros(m)
+    trade_count = np.zeros(m, dtype=int)
+    stop_count = np.zeros(m, dtype=int)
+    trade_log = []
+
+    equity = np.full(n, float(capital))
+    pair_pnl = np.zeros((n, m))
+    peak = float(capital)
+    halted = False
+
+    for t in range(n):
+        x, y = X[t], Y[t]
+        kf.update(x, y)
+        alpha = kf.alpha
+        if t == 0:
+            continue  # The first bar only seeds the filters
+
+        spread = y - alpha * x
+        spread_stats.push(spread)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (spread - spread_stats.mean) / spread_stats.std
+
+        # --- Mark open positions --- #
+        is_open = side != 0
+        unrealized = qty_x * (x - entry_x) + qty_y * (y - entry_y)
+
+        # --- Exits: per-pair stop loss, then reversion through zero --- #
+        stopped = is_open & (unrealized < -stop_loss_pct * notional)
+        reverted = is_open & (((side > 0) & (z < 0)) | ((side < 0) & (z > 0)))
+        exits = stopped | reverted
+        if exits.any():
+            realized[exits] += unrealized[exits]
+            trade_count[exits] += 1
+            stop_count[stopped] += 1
+            for j in np.flatnonzero(exits):
+                trade_log.append((labels[j], prices.index[entry_t[j]], prices.index[t], side[j],
+                                  "stop loss" if stopped[j] else "exit", unrealized[j]))
+            side[exits] = 0
+            qty_x[exits] = 0
+            qty_y[exits] = 0
+
+        # --- Entries: flat pairs with |z| beyond the threshold, largest first --- #
+        free_slots = max_open_pairs - int(np.count_nonzero(side))
+        signal = ~is_open & (np.abs(z) > entry_z)
+        if not halted and free_slots > 0 and signal.any():
+            candidates = np.flatnonzero(signal)
+            filled = candidates[np.argsort(-np.abs(z[candidates]))][:free_slots]
+            direction = np.sign(z[filled])
+            units = notional / (np.abs(alpha[filled]) * x[filled] + y[filled])
+            side[filled] = direction
+            qty_y[filled] = direction * units
+            qty_x[filled] = -direction * units * alpha[filled]
+            entry_x[filled] = x[filled]
+            entry_y[filled] = y[filled]
+            entry_t[filled] = t
+
+        # --- Portfolio equity and attribution --- #
+        pair_pnl[t] = realized + qty_x * (x - entry_x) + qty_y * (y - entry_y)
+        equity[t] = capital + pair_pnl[t].sum()
+        peak = max(peak, equity[t])
+
+        # --- Portfolio drawdown stop: flatten everything and stop trading --- #
+        if portfolio_stop_pct is not None and not halted and peak - equity[t] > portfolio_stop_pct * capital:
+            halted = True
+            open_pairs = side != 0
+            unrealized = qty_x * (x - entry_x) + qty_y * (y - entry_y)
+            realized[open_pairs] += unrealized[open_pairs]
+            trade_count[open_pairs] += 1
+            stop_count[open_pairs] += 1
+            for j in np.flatnonzero(open_pairs):
+                trade_log.append((labels[j], prices.index[entry_t[j]], prices.index[t], side[j],
+                                  "portfolio stop", unrealized[j]))
+            side[:] = 0
+            qty_x[:] = 0
+            qty_y[:] = 0
+
+    # === Performance ===
+    equity = pd.Series(equity, index=prices.index, name="equity")
+    pair_pnl = pd.DataFrame(pair_pnl, index=prices.index, columns=labels)
+    bar_returns = equity.pct_change().dropna()
+    sharpe = 0
+    if bar_returns.std() > 0:
+        sharpe = bar_returns.mean() / bar_returns.std() * np.sqrt(periods_per_year)
+
+    trades = pd.DataFrame(trade_log, columns=["pair", "entry_time", "exit_time", "side", "reason", "pnl"])
+    wins = trades[trades["pnl"] > 0].groupby("pair").size()
+    summary = pd.DataFrame({
+        "pnl": pair_pnl.iloc[-1].to_numpy(),
+        "trades": trade_count,
+        "stops": stop_count,
+        "open_position": side != 0
+    }, index=labels)
+    summary["win_rate"] = (wins.reindex(labels).fillna(0) / summary["trades"].where(summary["trades"] > 0)).to_numpy()
+    summary["pnl_share"] = summary["pnl"] / summary["pnl"].abs().sum() if summary["pnl"].abs().sum() else 0.0
+
+    return {
+        "final_pnl": equity.iloc[-1] - capital,
+        "return_pct": (equity.iloc[-1] - capital) / capital * 100,
+        "sharpe": sharpe,
+        "max_drawdown": (equity.cummax() - equity).max(),
+        "trades": len(trades),
+        "equity_curve": equity,
+        "pair_pnl": pair_pnl,
+        "summary": summary.sort_values("pnl", ascending=False),
+        "trade_log": trades
+    }
+
+
+if __name__ == "__main__":
+    # python pairs_portfolio.py <pairs csv with x,y columns> <timestamp x ticker close csv>
+    pairs_df = pd.read_csv(sys.argv[1])
+    prices = pd.read_csv(sys.argv[2], index_col=0, parse_dates=True)
+    pairs = list(zip(pairs_df["x"], pairs_df["y"]))
+
+    results = backtest_pairs_portfolio(prices, pairs)
+    print(f"Pairs: {len(pairs)}, trades: {results['trades']}")
+    print(f"Total PnL: ${results['final_pnl']:,.2f} ({results['return_pct']:.2f}%)")
+    print(f"Sharpe Ratio: {results['sharpe']:.2f}, max drawdown: ${results['max_drawdown']:,.2f}")
+    print(results["summary"].head(20))
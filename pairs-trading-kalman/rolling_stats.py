@@ -0,0 +1,81 @@
+import numpy as np
+
+"""
+Fixed-window rolling mean / standard deviation in O(1) time and memory.
+
+Values are kept in a circular buffer of length `window`, and the mean and sum
+of squared deviations are maintained with Welford-style add/remove updates, so
+each new observation costs a constant amount of work however long the stream
+runs. The statistics are recomputed exactly from the buffer every
+`resync_every` pushes to stop floating point drift from accumulating. Values
+can be scalars or arrays of a fixed `shape`, in which case every element is an
+independent rolling window (e.g. one spread per pair).
+
+Used by the pairs backtest, the live pairs mode and the crypto paper trader.
+"""
+
+
+class RollingStats:
+    def __init__(self, window, shape=(), ddof=0, resync_every=None):
+        self.window = window
+        self.shape = shape
+        self.ddof = ddof
+        self.resync_every = resync_every or 100 * window
+        self.buffer = np.zeros((window,) + tuple(shape))
+        self.count = 0  # values currently in the window
+        self.pos = 0  # next buffer slot to overwrite
+        self.pushes = 0
+        self._mean = np.zeros(shape) if shape else 0.0
+        self._m2 = np.zeros(shape) if shape else 0.0
+
+    def push(self, value):
+        """Add a value, evicting the oldest one once the window is full."""
+        value = np.asarray(value, dtype=float) if self.shape else float(value)
+
+        if self.count < self.window:
+            # Welford add
+            self.count += 1
+            delta = value - self._mean
+            self._mean = self._mean + delta / self.count
+            self._m2 = self._m2 + delta * (value - self._mean)
+        else:
+            # Replace the oldest value: combined remove + add in one step
+            old = self.buffer[self.pos]
+            delta = value - old
+            new_mean = self._mean + delta / self.window
+            self._m2 = self._m2 + delta * (value - new_mean + old - self._mean)
+            self._mean = new_mean
+
+        self.buffer[self.pos] = value
+        self.pos = (self.pos + 1) % self.window
+        self.pushes += 1
+        if self.pushes % self.resync_every == 0:
+            self.resync()
+
+    def resync(self):
+        """Recompute the mean and squared deviations exactly from the buffer."""
+        values = self.buffer[:self.count]
+        self._mean = values.mean(axis=0)
+        self._m2 = ((values - self._mean) ** 2).sum(axis=0)
+
+    @property
+    def mean(self):
+        return self._mean if self.count else np.nan
+
+    @property
+    def var(self):
+        if self.count <= self.ddof:
+            return np.full(self.shape, np.nan) if self.shape else np.nan
+        return np.maximum(self._m2, 0.0) / (self.count - self.ddof)
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    @property
+    def full(self):
+        return self.count == self.window
+
+    def zscore(self, value):
+        """Z-score of `value` against the current window."""
+        return (value - self.mean) / self.std
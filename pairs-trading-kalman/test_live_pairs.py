@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from live_pairs import LivePairsStrategy, replay_bars, run
+
+"""
+Replay checks for the live pairs strategy's bar alignment.
+
+    python -m pytest test_live_pairs.py
+"""
+
+
+def make_bars(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = 100 + rng.normal(0, 1, n).cumsum()
+    y = 1.5 * x + rng.normal(0, 1, n)
+    return pd.DataFrame({"JPM": x, "AAPL": y}, index=pd.date_range("2024-01-01", periods=n, freq="5min"))
+
+
+def lagged_source(bars, lag, lagging="AAPL"):
+    """Replay `bars` with one leg's feed arriving `lag` bars behind the other's."""
+    leading = "JPM" if lagging == "AAPL" else "AAPL"
+    for i in range(len(bars) + lag):
+        if i < len(bars):
+            yield leading, bars.index[i], bars[leading].iloc[i]
+        if i >= lag:
+            yield lagging, bars.index[i - lag], bars[lagging].iloc[i - lag]
+
+
+def test_in_step_replay_steps_every_timestamp():
+    bars = make_bars()
+    signals = run(LivePairsStrategy("JPM", "AAPL"), replay_bars(bars))
+    assert signals["timestamp"].tolist() == bars.index.tolist()
+    np.testing.assert_array_equal(signals["x"], bars["JPM"])
+    np.testing.assert_array_equal(signals["y"], bars["AAPL"])
+
+
+def test_lagging_leg_steps_each_timestamp_once():
+    bars = make_bars()
+    strategy = LivePairsStrategy("JPM", "AAPL", max_pending=3)
+    signals = run(strategy, lagged_source(bars, lag=5))
+
+    # Each timestamp stepped exactly once, in order, and no leading bar lost
+    assert signals["timestamp"].is_monotonic_increasing
+    assert signals["timestamp"].tolist() == bars.index.tolist()
+    np.testing.assert_array_equal(signals["x"], bars["JPM"])
+    assert signals[["x", "y"]].notna().all().all()
+
+    # The lagging leg is carried forward, never more stale than its lag
+    y_bar = signals["y"].map(pd.Series(np.arange(len(bars)), index=bars["AAPL"]))
+    stale = np.arange(len(signals)) - y_bar
+    assert stale.min() >= 0 and stale.max() <= 5
+    assert not strategy.pending["JPM"] and not strategy.pending["AAPL"]
+
+
+def test_no_forced_step_before_lagging_leg_reports():
+    bars = make_bars(n=50)
+    strategy = LivePairsStrategy("JPM", "AAPL", max_pending=3)
+    for i in range(10):
+        assert strategy.on_bar("JPM", bars.index[i], bars["JPM"].iloc[i]) == []
+    assert len(strategy.pending["JPM"]) == 10  # queued, not dropped
+    assert strategy.flush() == []
+
+    # Once the lagging leg reports, the queued bars are stepped in order against its close
+    signals = strategy.on_bar("AAPL", bars.index[0], bars["AAPL"].iloc[0])
+    assert len(signals) == 10 - 3  # the last max_pending bars wait for the lagging leg
+    signals += strategy.flush()
+    assert all(s["y"] == bars["AAPL"].iloc[0] for s in signals)
+    assert [s["timestamp"] for s in signals] == list(bars.index[:10])
+    assert [s["x"] for s in signals] == list(bars["JPM"].iloc[:10])
+
+
+def test_late_bar_refreshes_carried_close():
+    bars = make_bars(n=10)
+    strategy = LivePairsStrategy("JPM", "AAPL", max_pending=1)
+    strategy.on_bar("AAPL", bars.index[0], 10.0)
+    strategy.on_bar("JPM", bars.index[0], 1.0)
+    strategy.on_bar("JPM", bars.index[1], 1.1)
+    signals = strategy.on_bar("JPM", bars.index[2], 1.2)  # forces t1 against AAPL's t0 close
+    assert [(s["timestamp"], s["y"]) for s in signals] == [(bars.index[1], 10.0)]
+
+    assert strategy.on_bar("AAPL", bars.index[1], 11.0) == []  # already stepped
+    signals = strategy.on_bar("JPM", bars.index[3], 1.3)
+    assert [(s["timestamp"], s["y"]) for s in signals] == [(bars.index[2], 11.0)]
+    assert strategy.on_bar("AAPL", bars.index[0], 9.0) == []  # older than the carried close
+    assert strategy.last_close["AAPL"] == 11.0
@@ -1,10 +1,12 @@
 import requests
 import pandas as pd
 import time
+from constants import API_KEY, POLYGON_BASE_URL, US_COMMON_STOCKS_PATH, EXPORT_CSV
+from artifact_io import write_artifact
 
 # --- Fetch US Common Stocks from Polygon API ---
-api_key = "INSERT API KEY HERE"
-base_url = "https://api.polygon.io/v3/reference/tickers"
+api_key = API_KEY
+base_url = f"{POLYGON_BASE_URL}/v3/reference/tickers"
 # Set up parameters for the API request
 tickers = []
 cursor = None
@@ -40,6 +42,6 @@ while True:
 
 # --- Convert the list of tickers to a DataFrame ---
 df = pd.DataFrame(tickers)
-# Save to CSV
-df.to_csv(r"FILE PATH FOR US COMMON STOCKS", index=False)
+# Save as a typed artifact
+write_artifact(df, US_COMMON_STOCKS_PATH, export_csv=EXPORT_CSV)
 print(f"Saved {len(df)} tickers.")
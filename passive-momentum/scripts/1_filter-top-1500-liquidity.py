@@ -1,49 +1,52 @@
 import pandas as pd
-import numpy as np
-import time
-from polygon import RESTClient
-from datetime import datetime, timedelta
-from tqdm import tqdm
+from polygon_fetch import PolygonFetcher
+from datetime import timedelta
+from bar_store import BarStore
+from constants import (ENTRY_DATE, API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE, LIQUIDITY_LOOKBACK_DAYS,
+                       MIN_VALID_DAYS, TOP_N_LIQUID, US_COMMON_STOCKS_PATH, TOP_LIQUID_STOCKS_PATH, EXPORT_CSV)
+from grouped_daily import fetch_grouped_range, to_panel, add_to_store
+from artifact_io import read_artifact, write_artifact
+
+# --- Ingestion mode --- #
+# "grouped": one grouped daily request per date covers every ticker (~250 requests a year)
+# "per_ticker": one aggregates request per ticker through the bar store
+ingestion_mode = "grouped"
 
 # --- Setup Polygon Key + API Client --- #
-polygon_key = "INSERT API KEY HERE"
-client = RESTClient(polygon_key)
+polygon_key = API_KEY
+# Concurrent, rate-limited fetches for anything missing from the local bar store
+fetcher = PolygonFetcher(polygon_key, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE)
+store = BarStore(fetcher=fetcher)
 
 # --- Load all tickers ---
-df = pd.read_csv(r"FILE PATH FOR US COMMON STOCKS")
+df = read_artifact(US_COMMON_STOCKS_PATH, columns=["ticker"])
 tickers = df["ticker"].tolist()
 
 # --- Set time window ---
-end_date = datetime(2024, 6, 12 )
-start_date = end_date - timedelta(days=365)
-
-# --- Store liquidity info ---
-results = []
-
-for ticker in tqdm(tickers, desc="Processing Tickers"):
-    try:
-        bars = client.get_aggs(
-            ticker,
-            1, "day",
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d")
-        )
-        time.sleep(0.3)  # To avoid rate limits
-
-        # Compute avg dollar volume
-        volume = [bar.volume for bar in bars if bar.close and bar.volume]
-        if len(volume) >= 200:  # Ensure we have enough data
-            # Calculate average dollar volume
-            adv = np.mean(volume)
-            results.append((ticker, adv))
-    except Exception as e:
-        continue
-
+end_date = ENTRY_DATE
+start_date = end_date - timedelta(days=LIQUIDITY_LOOKBACK_DAYS)
+
+# --- Build (date x ticker) volume and close panels ---
+if ingestion_mode == "grouped":
+    bars = fetch_grouped_range(start_date, end_date, fetcher)
+    # Keep the bars in the local store so later stages do not fetch them again
+    add_to_store(store, bars, tickers, start_date, end_date)
+    volume = to_panel(bars, "volume", tickers)
+    close = to_panel(bars, "close", tickers)
+else:
+    volume = store.get_panel(tickers, start_date, end_date, field="volume")
+    close = store.get_panel(tickers, start_date, end_date, field="close", fill=False)
+
+# --- Compute avg dollar volume ---
+# Only days with both a close and a volume count
+volume = volume.where((close > 0) & (volume > 0))
+enough_data = volume.count() >= MIN_VALID_DAYS  # Ensure we have enough data
+avg_volume = volume.mean()[enough_data]
 
 # --- Convert to DataFrame ---
-liq_df = pd.DataFrame(results, columns=["ticker", "avg_dollar_volume"])
-liq_df = liq_df.sort_values(by="avg_dollar_volume", ascending=False).head(1500)
+liq_df = pd.DataFrame({"ticker": avg_volume.index, "avg_dollar_volume": avg_volume.to_numpy()})
+liq_df = liq_df.sort_values(by="avg_dollar_volume", ascending=False).head(TOP_N_LIQUID)
 
-# Save to CSV
-liq_df.to_csv(r"FILE PATH FOR TOP 1500 LIQUID STOCKS", index=False)
-print("Saved top 1500 liquid stocks.")
+# Save as a typed artifact
+write_artifact(liq_df.reset_index(drop=True), TOP_LIQUID_STOCKS_PATH, export_csv=EXPORT_CSV)
+print(f"Saved top {TOP_N_LIQUID} liquid stocks.")
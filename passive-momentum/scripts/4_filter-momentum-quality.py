@@ -1,11 +1,12 @@
-import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-from polygon import RESTClient
-from tqdm import tqdm
-from constants import ENTRY_DATE, EXIT_DATE, API_KEY
-tqdm.pandas() # For progress bar
+from polygon_fetch import PolygonFetcher
+from constants import (ENTRY_DATE, EXIT_DATE, API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE, BETA_QUANTILE,
+                       RETURN_9M_QUANTILE, RETURN_6M_QUANTILE, TOP_N_MOMENTUM, QUALITY_LOOKBACK_DAYS, TOP_N_QUALITY,
+                       MOMENTUM_BETA_PATH, MOMENTUM_QUALITY_PATH, EXPORT_CSV)
+from artifact_io import read_artifact, write_artifact
+from bar_store import BarStore
+from momentum_features import momentum_quality, momentum_filters
 
 
 """
@@ -19,61 +20,31 @@ momentum smoothness and selects the top 50 stocks with the highest momentum qual
 
 
 
-# --- Load CSV File with Ticker data --- #
-df = pd.read_csv(r"FILE PATH FOR TOP 1500 STOCKS WITH MOMENTUM AND BETA COMPUTED")
+# --- Load Ticker data --- #
+df = read_artifact(MOMENTUM_BETA_PATH)
 
-# --- Filter out top 10% beta stocks --- #
-df = df[df['beta'] < df['beta'].quantile(0.9)] # i.e. we are keeping bottom 90% quantile beta
-
-# --- Filter out bottom 5% 9 month return stocks --- #
-df = df[df['9month_return'] > df['9month_return'].quantile(0.05)] # i.e. we are keeping top 95% quantile 9 month return
-
-# --- Filter out bottom 5% 6 month return stocks --- #
-df = df[df['6month_return'] > df['6month_return'].quantile(0.05)] # i.e. we are keeping top 95% quantile 6 month return
-
-# --- Sort by 2-12 month return --- #
-df = df.sort_values(by="2month_return", ascending=False)
-# Keep top 100 stocks with highest 2-12 month return
-df = df.head(100).reset_index(drop=True) 
+# --- Filter out top 10% beta, bottom 5% 9 month and bottom 5% 6 month return stocks --- #
+# Then keep the top 100 stocks with highest 2-12 month return (shared with rolling_selection.py)
+df = momentum_filters(df, BETA_QUANTILE, RETURN_9M_QUANTILE, RETURN_6M_QUANTILE, TOP_N_MOMENTUM)
 
 # --- Compute momentum quality of stocks based on Frog-in-the-Pan metric --- #
 # First setup polygon API parameters
 polygon_key = API_KEY
-client = RESTClient(polygon_key)
-# Setup a function to extract momentum quality for a given ticker
-def get_momentum_quality(ticker, lookback = 365):
-    # Extract daily bars for the last 365 days (252 trading days)
-    try:
-        # Set time window parameters
-        end_date = ENTRY_DATE
-        start_date = end_date - timedelta(days=lookback)
-        # Make call to Polygon API to get daily bars
-        bars = client.get_aggs(
-            ticker,
-            1, "day",
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d")
-        )
-        # Store closing prices in a list
-        prices = [bar.close for bar in bars if bar.close is not None]
-        # Compute daily returns and store in a pandas series
-        daily_returns = pd.Series(prices).pct_change().dropna().reset_index(drop=True)
-        # Compute number of days where returns were positive
-        positive_days = (daily_returns > 0).sum()
-        # Assign a momentum score based on the number of positive days
-        momentum_score = positive_days / len(daily_returns) if daily_returns.size > 0 else 0
-        # Return the momentum score
-        return momentum_score
-    except Exception as e:
-        print(f"Error fetching data for {ticker}: {e}")
-        return None
+# Concurrent, rate-limited fetches for anything missing from the local bar store
+fetcher = PolygonFetcher(polygon_key, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE)
+store = BarStore(fetcher=fetcher)
 
 # --- Compute momentum quality score for each stock --- #
-df['momentum_quality'] = df['ticker'].progress_apply(lambda x: get_momentum_quality(x))
+# Daily closes for the last 365 days (252 trading days) for all 100 stocks, fetched concurrently if missing
+closes = store.get_panel(df['ticker'].tolist(), ENTRY_DATE - timedelta(days=QUALITY_LOOKBACK_DAYS), ENTRY_DATE, field="close")
+# Fraction of positive days, plus the signed FIP score, for every stock in one pass
+quality = momentum_quality(closes, ENTRY_DATE, lookback=QUALITY_LOOKBACK_DAYS)
+df['momentum_quality'] = df['ticker'].map(quality['momentum_quality'])
+df['fip'] = df['ticker'].map(quality['fip'])
 # Sort by momentum quality
-df = df.sort_values(by="momentum_quality", ascending=False)
+df = df.sort_values(by="momentum_quality", ascending=False, kind="stable")  # ties keep 2-12 month order
 # Keep top 50 stocks with highest momentum quality
-df = df.head(50).reset_index(drop=True)
+df = df.head(TOP_N_QUALITY).reset_index(drop=True)
 
-# --- Save the filtered DataFrame to a new CSV file --- #
-df.to_csv(r"FILE PATH FOR FILTERED TOP 100 RETURNS", index=False)
\ No newline at end of file
+# --- Save the filtered DataFrame as a typed artifact --- #
+write_artifact(df, MOMENTUM_QUALITY_PATH, export_csv=EXPORT_CSV)
\ No newline at end of file
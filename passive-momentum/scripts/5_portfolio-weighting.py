@@ -2,36 +2,36 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-from polygon import RESTClient
+from polygon_fetch import PolygonFetcher
 from tqdm import tqdm
-from constants import API_KEY
+from constants import (API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE, PORTFOLIO_SIZE,
+                       MOMENTUM_QUALITY_PATH, PORTFOLIO_INVESTMENT_PATH, EXPORT_CSV)
+from artifact_io import read_artifact, write_artifact
+from bar_store import BarStore
 tqdm.pandas()  # For progress bar
 
 # --- Setup Polygon Key + API Client --- #
 api_key = API_KEY
-client = RESTClient(api_key)
+# Concurrent, rate-limited fetches for anything missing from the local bar store
+fetcher = PolygonFetcher(api_key, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE)
+store = BarStore(fetcher=fetcher)
 
 # --- Set Portfolio Parameters --- #
-portfolio_size = 1_000_000
+portfolio_size = PORTFOLIO_SIZE
 rebalance_date = datetime(2024, 5, 15 )
 
 # --- Load filtered stocks --- #
-df = pd.read_csv(r"FILE PATH FOR TOP 100 STOCKS BY RETURNS")
+df = read_artifact(MOMENTUM_QUALITY_PATH, columns=["ticker"])
 # Compute portfolio parameters
 weights = [1 / len(df)] * len(df) # Equal weight for each stock
 dollar_alloc = [portfolio_size * (1 / len(df))] * len(df) # Dollar allocation for each stock
 # Function to retrieve the latest closing price for a given ticker
 def get_latest_price(ticker):
     try:
-        # Fetch daily bars for the last 2 days using Polygon API
-        bars = client.get_aggs(
-            ticker, 
-            1, "day",
-            (datetime.now() - timedelta(days = 2)).strftime("%Y-%m-%d"),
-            datetime.now().strftime("%Y-%m-%d")
-        )
+        # Daily bars for the last 2 days from the local store (fetched from Polygon if missing)
+        bars = store.get(ticker, datetime.now() - timedelta(days = 2), datetime.now())
         # Obtain the latest closing price
-        prices = [bar.close for bar in bars if bar.close is not None]
+        prices = bars["close"].dropna().tolist()
         # Ensure we have data, return last price in the list (most recent price)
         return prices[-1] if prices else None
     except Exception as e:
@@ -40,12 +40,14 @@ def get_latest_price(ticker):
     
 # --- Create DataFrame for top 50 stocks --- #
 top_50_stocks = pd.DataFrame(list(zip(df['ticker'], weights, dollar_alloc)), columns = ['ticker', 'weights', 'dollar_alloc'])
+# Fetch the last 2 days of bars for every stock concurrently
+store.fill(top_50_stocks['ticker'].tolist(), datetime.now() - timedelta(days = 2), datetime.now())
 # Store latest price and share allocation
 top_50_stocks['latest_price'] = top_50_stocks['ticker'].progress_apply(lambda x: get_latest_price(x))
 top_50_stocks['share_alloc'] = top_50_stocks.progress_apply(lambda x: x['dollar_alloc'] / x['latest_price'], axis=1)
 # Round to nearest whole number shares
 top_50_stocks['share_alloc'] = top_50_stocks['share_alloc'].round()
 
-# --- Save to CSV --- #
-top_50_stocks.to_csv(r"FILE PATH FOR TOP 50 FILTERED STOCKS TO INVEST IN", index=False)
+# --- Save as a typed artifact --- #
+write_artifact(top_50_stocks, PORTFOLIO_INVESTMENT_PATH, export_csv=EXPORT_CSV)
 print("Portfolio investment data saved.")
@@ -1,10 +1,14 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from polygon import RESTClient
+from polygon_fetch import PolygonFetcher
 from datetime import datetime
-from tqdm import tqdm
-from constants import ENTRY_DATE, EXIT_DATE, API_KEY
+from constants import (ENTRY_DATE, EXIT_DATE, API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE, PORTFOLIO_SIZE,
+                       REBALANCE_FREQUENCY, TRANSACTION_COST_BPS, PORTFOLIO_INVESTMENT_PATH, BACKTEST_RESULTS_PATH,
+                       SPY_RETURNS_PATH)
+from artifact_io import read_artifact, write_artifact
+from bar_store import BarStore
+from backtest_engine import rebalance_dates, fixed_weight_schedule, run_backtest
 
 
 """
@@ -12,99 +16,66 @@ Author: Carson Bowler
 
 This script performs a full backtest of the momentum strategy by tracking the 
 daily returns of each stock in the final portfolio from entry to rebalance date.
-It computes weighted portfolio performance, compares it against SPY, and plots 
+It simulates the weighted portfolio with backtest_engine.py (buy-and-hold by 
+default, or periodic rebalancing with transaction costs), compares it against SPY, and plots 
 both cumulative portfolio value and individual stock return paths. It also saves 
-portfolio and benchmark return data to CSV for further analysis.
+portfolio and benchmark return data (with CSV copies) for further analysis.
 """
 
 
 
 # --- Setup Polygon Key + API Client --- #
 api_key = API_KEY
-client = RESTClient(api_key)
+# Concurrent, rate-limited fetches for anything missing from the local bar store
+fetcher = PolygonFetcher(api_key, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE)
+store = BarStore(fetcher=fetcher)
 
 # --- Backtesting Parameters --- #
 start_date = ENTRY_DATE
 rebalance_date = EXIT_DATE
 
 # --- Load filtered stocks --- #
-df = pd.read_csv(r"FILE PATH FOR TOP 50 FILTERED STOCKS TO INVEST IN")
-
-# --- Function to compute return relative to entry --- #
-def compute_relative_returns(ticker, end_date=rebalance_date):
-    try:
-        # Fetch daily bars for the last 2 days using Polygon API
-        bars = client.get_aggs(ticker, 1, "day",
-                               start_date.strftime("%Y-%m-%d"),
-                               end_date.strftime("%Y-%m-%d"))
-        daily_prices = [bar.close for bar in bars if bar.close is not None]
-        dates = [pd.to_datetime(bar.timestamp, unit='ms').date() for bar in bars if bar.close is not None]
-        # Ensure we have data
-        if len(daily_prices) == 0:
-            return None
-        # Convert to Series and sort by date
-        price_series = pd.Series(daily_prices, index=pd.to_datetime(dates)).sort_index()
-        # Ensure we have data from start_date
-        entry_price = price_series.iloc[0]
-        # Compute relative returns
-        if entry_price == 0:
-            return None
-        # Compute relative returns from entry price
-        relative_returns = (price_series / entry_price) - 1
-        return relative_returns
-    except Exception as e:
-        print(f"Error fetching data for {ticker}: {e}")
-        return None
-
-# --- Compute return series for each stock --- #
-# Initialize an empty DataFrame to store returns
-returns_df = pd.DataFrame()
-# Loop through each ticker in the DataFrame
-for i, row in tqdm(df.iterrows(), total=len(df)):
-    ticker = row['ticker']
-    # Compute relative returns
-    rel_returns = compute_relative_returns(ticker)
-    # If returns are computed successfully, add to DataFrame
-    if rel_returns is not None:
-        returns_df[ticker] = rel_returns
-    else:
-        print(f"Failed to compute returns for {ticker}")
-
-# --- Apply initial weights (fixed) --- #
-weights = df.set_index('ticker')['weights']
-weighted_returns_df = returns_df.multiply(weights, axis=1)
-
-# --- Sum weighted returns to get portfolio cumulative return --- #
-portfolio_cumulative_return = weighted_returns_df.sum(axis=1)
-
-# --- Convert to portfolio value starting from $1,000,000 --- #
-portfolio_value = 1_000_000 * (1 + portfolio_cumulative_return)
-
-# --- Save to CSV --- #
+df = read_artifact(PORTFOLIO_INVESTMENT_PATH, columns=["ticker", "weights"])
+# Fetch any missing bars for the portfolio and SPY in one pass
+store.fill(df['ticker'].tolist() + ["SPY"], start_date, rebalance_date)
+
+# --- Daily close panel for every stock from entry to end date --- #
+prices = store.get_panel(df['ticker'].tolist(), start_date, rebalance_date, field="close", fill=False)
+prices = prices.loc[:, prices.notna().any() & (prices.bfill().iloc[0] != 0)]
+for ticker in df['ticker'][~df['ticker'].isin(prices.columns)]:
+    print(f"Failed to compute returns for {ticker}")
+
+# --- Return of each stock relative to its entry price --- #
+returns_df = prices / prices.bfill().iloc[0] - 1
+
+# --- Simulate the target weights (drift, optional rebalancing and costs) --- #
+weights = df.set_index('ticker')['weights'].reindex(prices.columns)
+schedule = fixed_weight_schedule(weights, rebalance_dates(prices.index, REBALANCE_FREQUENCY))
+backtest = run_backtest(prices, schedule, PORTFOLIO_SIZE, cost_bps=TRANSACTION_COST_BPS)
+
+# --- Convert to portfolio value starting from PORTFOLIO_SIZE ($1,000,000) --- #
+portfolio_value = backtest["equity_curve"]
+portfolio_cumulative_return = portfolio_value / PORTFOLIO_SIZE - 1
+print(f"Total return: {backtest['total_return']:.2%}, Sharpe: {backtest['sharpe']:.2f}, "
+      f"max drawdown: {backtest['max_drawdown']:.2%}, costs: ${backtest['total_cost']:,.2f}")
+
+# --- Save results (artifact plus CSV copy for inspection) --- #
 results_df = pd.DataFrame({
     'portfolio_cumulative_return': portfolio_cumulative_return,
     'portfolio_value': portfolio_value
 })
 results_df.index.name = 'Date'
-results_df.to_csv(r"FILE PATH FOR PORTFOLIO BACKTEST RESULTS", index=True)
+write_artifact(results_df, BACKTEST_RESULTS_PATH, export_csv=True)
 
 # --- Fetch SPY data and compute daily returns --- #
-spy_bars = client.get_aggs(
-    "SPY", 1, "day",
-    start_date.strftime("%Y-%m-%d"),
-    rebalance_date.strftime("%Y-%m-%d")
-)
-spy_prices = [bar.close for bar in spy_bars if bar.close is not None]
-spy_dates = [pd.to_datetime(bar.timestamp, unit='ms').date() for bar in spy_bars if bar.close is not None]
-# Convert to Series
-spy_series = pd.Series(spy_prices, index=pd.to_datetime(spy_dates)).sort_index()
+spy_series = store.get("SPY", start_date, rebalance_date)["close"].dropna()
 spy_entry_price = spy_series.iloc[0]
 spy_returns = (spy_series / spy_entry_price) - 1  # Cumulative return from Jan 3
-spy_value = 1_000_000 * (1 + spy_returns)         # Scale to match portfolio dollars
+spy_value = PORTFOLIO_SIZE * (1 + spy_returns)         # Scale to match portfolio dollars
 # Convert to DataFrame with a column name
 spy_returns_df = spy_returns.to_frame(name='Daily Returns')
-# Save to CSV
-spy_returns_df.to_csv(r"C:\Users\bowle\trading-scripts\momentum\spy_daily_returns.csv")
+# Save (artifact plus CSV copy)
+write_artifact(spy_returns_df, SPY_RETURNS_PATH, export_csv=True)
 
 # --- Plot portfolio vs SPY --- #
 import matplotlib.pyplot as plt
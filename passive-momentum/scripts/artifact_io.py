@@ -0,0 +1,76 @@
+import os
+import sys
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+"""
+Typed columnar I/O for the intermediate artifacts passed between scripts.
+
+Artifacts are uncompressed Arrow IPC (Feather v2) files. Column dtypes and the
+index (dates, tickers) round-trip exactly, reads are memory-mapped so a large
+panel is mapped rather than parsed, and `columns` projects the read down to
+the columns a script actually needs. A CSV copy can be exported next to any
+artifact for inspection:
+
+    python artifact_io.py export ../data/2025-01-03/momentum_quality.arrow
+
+If an artifact has not been written in Arrow form yet, reads fall back to the
+CSV with the same stem, so data saved by earlier CSV-only runs still loads.
+Does not import `constants`, so the crypto scripts can share it through
+sys.path without picking up this project's constants.
+"""
+
+
+def csv_path(path):
+    return Path(path).with_suffix(".csv")
+
+
+def write_artifact(df, path, export_csv=False):
+    """Write `df` (with its index) to an Arrow artifact, optionally exporting a CSV copy alongside it."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=not isinstance(df.index, pd.RangeIndex))
+    # Write then rename so readers never see a half-written artifact
+    tmp_path = path.with_suffix(".tmp")
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    if export_csv:
+        export_artifact_csv(path, df)
+    return path
+
+
+def read_artifact(path, columns=None, memory_map=True, index_col=None):
+    """
+    Read an artifact as a DataFrame, optionally projected to `columns`.
+
+    The index is restored with the selected columns. `index_col` is only used
+    when falling back to a CSV copy (e.g. 0 for a date-indexed panel).
+    """
+    path = Path(path)
+    if not path.exists() and csv_path(path).exists():
+        df = pd.read_csv(csv_path(path), index_col=index_col, parse_dates=index_col is not None)
+        return df if columns is None else df[columns]
+
+    if columns is not None:
+        # Keep the stored index columns so projected reads still come back indexed
+        with pa.memory_map(str(path)) as source:
+            schema = pa.ipc.open_file(source).schema
+        index_columns = [c for c in (schema.pandas_metadata or {}).get("index_columns", []) if isinstance(c, str)]
+        columns = list(columns) + [c for c in index_columns if c not in columns]
+    return feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+
+
+def export_artifact_csv(path, df=None):
+    """Write the CSV copy of an artifact for inspection and return its path."""
+    df = read_artifact(path) if df is None else df
+    df.to_csv(csv_path(path), index=not isinstance(df.index, pd.RangeIndex))
+    return csv_path(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "export":
+        # python artifact_io.py export <artifact> [<artifact> ...]
+        for artifact in sys.argv[2:]:
+            print(f"Exported {export_artifact_csv(artifact)}")
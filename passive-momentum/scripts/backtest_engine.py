@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+"""
+Vectorized portfolio backtest over a (date x ticker) price panel.
+
+A schedule of target weights (one row per rebalance date) is simulated with
+share holdings held constant between rebalances, so positions drift with
+prices. Each holding period is valued in one array operation over all of its
+days and tickers, leaving a loop over rebalance dates only. At every
+rebalance the book is traded back to the target weights, proportional
+transaction costs are charged on the traded notional, and whatever is not
+invested (weights summing below one, costs) sits in cash accruing
+`cash_rate`. A name with no price yet at a rebalance keeps its weight in cash
+until its first close, and is bought at that close, so a stock that starts
+trading after the entry date still enters at its own first bar. A single-row schedule with zero costs is
+the fixed-weight buy-and-hold of 6_backtest.py; a monthly or quarterly schedule
+simulates a multi-year rolling strategy in one run.
+"""
+
+
+def rebalance_dates(index, freq=None):
+    """First trading day of each period in `index` ("M" monthly, "Q" quarterly); only the first day if None."""
+    index = pd.DatetimeIndex(index).sort_values()
+    if freq is None:
+        return index[:1]
+    firsts = pd.Series(index, index=index).groupby(index.to_period(freq)).first()
+    return pd.DatetimeIndex(firsts.to_numpy())
+
+
+def fixed_weight_schedule(weights, dates):
+    """Target weight schedule rebalancing back to the same `weights` Series on every date."""
+    return pd.DataFrame([weights.to_numpy()] * len(dates), index=pd.DatetimeIndex(dates), columns=weights.index)
+
+
+def run_backtest(prices, target_weights, initial_capital=1_000_000, cost_bps=0.0, cash_rate=0.0,
+                 periods_per_year=252):
+    """
+    Simulate a target weight schedule over a close price panel.
+
+    `target_weights` is a (rebalance date x ticker) DataFrame; a date that is not
+    a trading day rebalances on the next one. Prices are forward filled, so a
+    name that stops trading is carried at its last close. `cost_bps` is charged
+    on the absolute traded notional at each rebalance and `cash_rate` is an
+    annual rate earned on cash. Late entries are charged the same cost, and
+    their notional and cost are counted in the rebalance that reserved them.
+    """
+    tickers = list(target_weights.columns)
+    prices = prices.sort_index().reindex(columns=tickers).ffill()
+    P = prices.to_numpy(dtype=float)
+    n, m = P.shape
+
+    # --- Map rebalance dates to trading rows (the last schedule row wins on a shared day) --- #
+    targets = target_weights.sort_index().fillna(0.0)
+    rows = prices.index.searchsorted(targets.index, side="left")
+    on_calendar = rows < n
+    W = pd.DataFrame(targets.to_numpy(dtype=float)[on_calendar], index=rows[on_calendar])
+    W = W.groupby(level=0).last()
+    rows, W = W.index.to_numpy(), W.to_numpy()
+
+    holdings = np.zeros((n, m))
+    cash_path = np.full(n, float(initial_capital))
+    turnover = np.zeros(len(rows))
+    costs = np.zeros(len(rows))
+    daily_rate = (1 + cash_rate) ** (1 / periods_per_year) - 1
+
+    # Cash before the first rebalance
+    first = rows[0] if len(rows) else n
+    cash_path[:first] = initial_capital * (1 + daily_rate) ** np.arange(first)
+    cash = initial_capital * (1 + daily_rate) ** first
+    shares = np.zeros(m)
+
+    # --- Rebalance, then let the book drift until the next rebalance --- #
+    bounds = np.append(rows, n)
+    for k, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        px = P[start]
+        tradable = ~np.isnan(px)
+        current = np.where(tradable, shares * np.nan_to_num(px), 0.0)
+        value = cash + current.sum()
+
+        target = np.where(tradable, W[k] * value, 0.0)
+        reserved = np.where(tradable, 0.0, W[k] * value)  # cash held for names without a price yet
+        # Size the trade on value net of its own cost, so fully invested weights are not funded by negative cash
+        scale = 1 - np.abs(target - current).sum() * cost_bps / 1e4 / value
+        target, reserved = target * scale, reserved * scale
+        turnover[k] = np.abs(target - current).sum()
+        costs[k] = turnover[k] * cost_bps / 1e4
+        shares = np.divide(target, px, out=np.zeros(m), where=tradable)
+        cash = value - target.sum() - costs[k]
+        growth = (1 + daily_rate) ** np.arange(end - start)
+        cash_path[start:end] = cash * growth
+
+        # Buy each late name at its first close in the period out of the cash reserved for it
+        # (prices are only NaN before a name's first close, so earlier rows stay unheld)
+        entered = 0.0
+        for j in np.flatnonzero(reserved):
+            priced = np.flatnonzero(~np.isnan(P[start:end, j]))
+            if not len(priced):
+                continue  # Still no price: the reserved cash goes into the next rebalance
+            first_close = priced[0]
+            spent = reserved[j] * growth[first_close]
+            notional = spent / (1 + cost_bps / 1e4)
+            shares[j] = notional / P[start + first_close, j]
+            cash_path[start + first_close:end] -= reserved[j] * growth[first_close:]
+            turnover[k] += notional
+            costs[k] += spent - notional
+            entered += reserved[j]
+
+        # Share counts are fixed over the holding period, so drift is one panel product
+        holdings[start:end] = np.nan_to_num(P[start:end] * shares)
+        cash = (cash - entered) * (1 + daily_rate) ** (end - start)
+
+    # === Performance ===
+    equity = pd.Series(holdings.sum(axis=1) + cash_path, index=prices.index, name="equity")
+    weights = pd.DataFrame(holdings / equity.to_numpy()[:, None], index=prices.index, columns=tickers)
+    daily_returns = equity.pct_change().dropna()
+    sharpe = np.nan
+    if daily_returns.std() > 0:
+        sharpe = (daily_returns.mean() - daily_rate) / daily_returns.std() * np.sqrt(periods_per_year)
+    years = len(daily_returns) / periods_per_year
+    total_return = equity.iloc[-1] / initial_capital - 1
+
+    rebalances = pd.DataFrame({"turnover": turnover, "cost": costs}, index=prices.index[rows])
+    rebalances.index.name = "date"
+    return {
+        "final_value": equity.iloc[-1],
+        "total_return": total_return,
+        "cagr": (1 + total_return) ** (1 / years) - 1 if years > 0 else np.nan,
+        "volatility": daily_returns.std() * np.sqrt(periods_per_year),
+        "sharpe": sharpe,
+        "max_drawdown": (equity / equity.cummax() - 1).min(),
+        "total_cost": costs.sum(),
+        "equity_curve": equity,
+        "cash": pd.Series(cash_path, index=prices.index, name="cash"),
+        "weights": weights,
+        "rebalances": rebalances
+    }
@@ -0,0 +1,190 @@
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from tqdm import tqdm
+from constants import BAR_STORE_DIR
+
+"""
+Local columnar store of daily OHLCV bars shared by the pipeline stages.
+
+Each ticker's bars live in their own Parquet file under `root`, indexed by
+date, and a JSON manifest records which date ranges have already been fetched
+for every ticker (including ranges that returned no bars, so a delisted or
+thinly traded name is not requested again). Asking for a ticker and date range
+only fetches the sub-ranges the manifest does not cover yet, so a full pipeline
+run downloads each ticker-range once no matter how many stages read it.
+Coverage is only persisted through yesterday, so today's still-forming bar is
+fetched again on the next run.
+"""
+
+
+BAR_COLUMNS = ["open", "high", "low", "close", "volume", "vwap", "transactions"]
+ONE_DAY = pd.Timedelta(days=1)
+
+
+def _day(value):
+    return pd.Timestamp(value).normalize()
+
+
+def _merge_ranges(ranges):
+    # Merge overlapping or adjacent [start, end] day ranges
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def bars_to_frame(bars):
+    """Convert Polygon aggregate bars to a date-indexed OHLCV DataFrame."""
+    bars = [bar for bar in bars if bar.timestamp is not None]
+    frame = pd.DataFrame([[getattr(bar, col, None) for col in BAR_COLUMNS] for bar in bars],
+                         columns=BAR_COLUMNS,
+                         index=pd.to_datetime([bar.timestamp for bar in bars], unit="ms").normalize())
+    frame.index.name = "date"
+    return frame.astype(float)
+
+
+class BarStore:
+    def __init__(self, root=BAR_STORE_DIR, client=None, fetcher=None, pause=0.3, chunk_size=500):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.client = client  # polygon RESTClient, fetched from one ticker at a time
+        self.fetcher = fetcher  # PolygonFetcher, fetched from concurrently (preferred)
+        self.pause = pause  # seconds between sequential requests, to avoid rate limits
+        self.chunk_size = chunk_size  # concurrent requests written to disk per batch
+        self.manifest_path = self.root / "manifest.json"
+        self.manifest = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                self.manifest = {ticker: [[_day(s), _day(e)] for s, e in ranges]
+                                 for ticker, ranges in json.load(f).items()}
+        self._frames = {}  # Bars already read from disk this session
+
+    # --- Coverage --- #
+    def missing_ranges(self, ticker, start, end):
+        """Sub-ranges of [start, end] that have not been fetched for `ticker`."""
+        start, end = _day(start), _day(end)
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.manifest.get(ticker, []):
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start - ONE_DAY))
+            cursor = covered_end + ONE_DAY
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def mark_covered(self, ticker, start, end):
+        start, end = _day(start), _day(end)
+        self.manifest[ticker] = _merge_ranges(self.manifest.get(ticker, []) + [[start, end]])
+
+    def save_manifest(self):
+        yesterday = _day(datetime.now()) - ONE_DAY
+        manifest = {}
+        for ticker, ranges in self.manifest.items():
+            ranges = [[s, min(e, yesterday)] for s, e in ranges if s <= yesterday]
+            if ranges:
+                manifest[ticker] = [[s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")] for s, e in ranges]
+        # Write then rename so an interrupted save never corrupts the manifest
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    # --- Fetching --- #
+    def fetch_aggs(self, ticker, start, end):
+        bars = self.client.get_aggs(ticker, 1, "day", start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        return bars_to_frame(bars)
+
+    def fetch_many(self, tasks, progress=True):
+        """Fetch (ticker, start, end) tasks, yielding each with its bars."""
+        if self.fetcher is not None:
+            yield from self._fetch_concurrent(tasks, progress)
+            return
+        for ticker, start, end in tqdm(tasks, desc="Filling bar store", disable=not progress):
+            try:
+                frame = self.fetch_aggs(ticker, start, end)
+            except Exception as e:
+                print(f"Error fetching data for {ticker}: {e}")
+                continue
+            finally:
+                time.sleep(self.pause)
+            yield ticker, start, end, frame
+
+    def _fetch_concurrent(self, tasks, progress):
+        # Batches keep memory bounded and let an interrupted fill keep what it already wrote
+        with tqdm(total=len(tasks), desc="Filling bar store", disable=not progress) as bar:
+            for i in range(0, len(tasks), self.chunk_size):
+                chunk = tasks[i:i + self.chunk_size]
+                for (ticker, start, end), frame in zip(chunk, self.fetcher.fetch_frames(chunk)):
+                    bar.update()
+                    if isinstance(frame, Exception):
+                        print(f"Error fetching data for {ticker}: {frame}")
+                        continue
+                    frame.index = frame.index.normalize()
+                    yield ticker, start, end, frame
+
+    def fill(self, tickers, start, end, progress=True):
+        """Fetch whatever is missing for `tickers` over [start, end]. Returns the number of requests."""
+        tasks = [(ticker, s, e) for ticker in tickers for s, e in self.missing_ranges(ticker, start, end)]
+        if not tasks:
+            return 0
+        try:
+            for ticker, s, e, frame in self.fetch_many(tasks, progress):
+                self.add_bars(ticker, frame)
+                self.mark_covered(ticker, s, e)
+        finally:
+            self.save_manifest()
+        return len(tasks)
+
+    # --- Storage --- #
+    def _path(self, ticker):
+        return self.root / f"{ticker}.parquet"
+
+    def _load(self, ticker):
+        if ticker not in self._frames:
+            path = self._path(ticker)
+            if path.exists():
+                self._frames[ticker] = pd.read_parquet(path)
+            else:
+                self._frames[ticker] = bars_to_frame([])
+        return self._frames[ticker]
+
+    def add_bars(self, ticker, frame):
+        """Merge date-indexed bars into the ticker's file (newer rows win on overlap)."""
+        if frame.empty:
+            return
+        frame = frame.reindex(columns=BAR_COLUMNS).astype(float)
+        existing = self._load(ticker)
+        if not existing.empty:
+            frame = pd.concat([existing, frame])
+            frame = frame[~frame.index.duplicated(keep="last")]
+        frame = frame.sort_index()
+        frame.to_parquet(self._path(ticker))
+        self._frames[ticker] = frame
+
+    # --- Lookups --- #
+    def get(self, ticker, start=None, end=None, columns=None, fill=True):
+        """Date-indexed bars for one ticker over [start, end], fetching any missing range first."""
+        if fill and start is not None and end is not None:
+            self.fill([ticker], start, end, progress=False)
+        frame = self._load(ticker)
+        frame = frame.loc[_day(start) if start is not None else None:_day(end) if end is not None else None]
+        return frame if columns is None else frame[columns]
+
+    def get_panel(self, tickers, start, end, field="close", fill=True):
+        """(date x ticker) panel of one bar field over [start, end]."""
+        if fill:
+            self.fill(tickers, start, end)
+        panel = pd.DataFrame({ticker: self.get(ticker, start, end, fill=False)[field] for ticker in tickers})
+        return panel.sort_index()
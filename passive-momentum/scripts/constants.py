@@ -9,13 +9,59 @@ It allows for consistent date management and easy updates across scripts.
 
 # constants.py
 
+import os
+from pathlib import Path
 from datetime import datetime
 
-# Entry Date
+# Entry Date (override with the ENTRY_DATE environment variable, YYYY-MM-DD)
 ENTRY_DATE = datetime(2025, 1, 3)
 
-# Trade Exit Date
+# Trade Exit Date (override with the EXIT_DATE environment variable, YYYY-MM-DD)
 EXIT_DATE = datetime(2025, 1, 3)
 
+if os.environ.get("ENTRY_DATE"):
+    ENTRY_DATE = datetime.strptime(os.environ["ENTRY_DATE"], "%Y-%m-%d")
+if os.environ.get("EXIT_DATE"):
+    EXIT_DATE = datetime.strptime(os.environ["EXIT_DATE"], "%Y-%m-%d")
+
 # Polygon API Key
 API_KEY = "INSERT API KEY HERE"
+
+# Polygon request rate limit for your plan (requests per minute)
+POLYGON_REQUESTS_PER_MINUTE = 200
+
+# Polygon REST base URL (point at a local stand-in to replay recorded responses)
+POLYGON_BASE_URL = "https://api.polygon.io"
+
+# Filter Parameters
+LIQUIDITY_LOOKBACK_DAYS = 365  # window for average daily volume
+MIN_VALID_DAYS = 200  # days with a close and volume needed to rank liquidity
+TOP_N_LIQUID = 1500
+BETA_QUANTILE = 0.9  # keep stocks below this beta quantile
+RETURN_9M_QUANTILE = 0.05  # drop stocks at or below this 9 month return quantile
+RETURN_6M_QUANTILE = 0.05  # drop stocks at or below this 6 month return quantile
+TOP_N_MOMENTUM = 100  # keep the top N by 2-12 month return
+QUALITY_LOOKBACK_DAYS = 365  # window for the Frog-in-the-Pan positive-day ratio
+TOP_N_QUALITY = 50  # final portfolio size
+PORTFOLIO_SIZE = 1_000_000
+REBALANCE_FREQUENCY = None  # None for buy-and-hold, "M" monthly or "Q" quarterly back to the target weights
+TRANSACTION_COST_BPS = 0.0  # charged on traded notional at each rebalance
+
+# File Paths
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+date_str = ENTRY_DATE.strftime("%Y-%m-%d")
+# Stage artifacts are typed Arrow files (see artifact_io.py); set EXPORT_CSV to also write CSV copies
+EXPORT_CSV = False
+US_COMMON_STOCKS_PATH = DATA_DIR / "us_common_stocks.arrow"
+TOP_LIQUID_STOCKS_PATH = DATA_DIR / date_str / "top_liquid_stocks.arrow"
+MOMENTUM_BETA_PATH = DATA_DIR / date_str / "momentum_beta.arrow"
+MOMENTUM_QUALITY_PATH = DATA_DIR / date_str / "momentum_quality.arrow"
+PORTFOLIO_INVESTMENT_PATH = DATA_DIR / date_str / "portfolio_investment.arrow"
+BACKTEST_RESULTS_PATH = DATA_DIR / date_str / "backtest_results.arrow"
+SPY_RETURNS_PATH = DATA_DIR / date_str / "spy_daily_returns.arrow"
+PIPELINE_STATE_PATH = DATA_DIR / date_str / "pipeline_state.json"
+THRESHOLD_SWEEP_PATH = DATA_DIR / date_str / "threshold_sweep.arrow"
+ROLLING_DIR = DATA_DIR / "rolling"  # multi-date selections from rolling_selection.py
+
+# Local daily bar store shared by the pipeline stages
+BAR_STORE_DIR = DATA_DIR / "bars"
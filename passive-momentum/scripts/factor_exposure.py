@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+"""
+Vectorized factor exposures (betas) over a date-aligned returns panel.
+
+Every ticker's beta against a factor (e.g. SPY daily returns) is the
+covariance / variance of the two series over the days on which both have a
+return, computed for the whole (date x ticker) panel in a few array operations
+instead of one regression per ticker. Missing returns are masked per ticker,
+so each beta uses exactly the pairwise-complete days and matches an OLS slope
+fitted on that ticker alone. Rolling betas use windowed sums of the same masked
+moments, and betas over arbitrary date windows (e.g. one per entry date) are
+differences of one set of prefix sums.
+"""
+
+
+def _masked_inputs(returns, factor):
+    # Align the factor to the panel's dates and mask days where either is missing
+    R = returns.to_numpy(dtype=float)
+    f = factor.reindex(returns.index).to_numpy(dtype=float)[:, None]
+    mask = ~np.isnan(R) & ~np.isnan(f)
+    return np.where(mask, R, 0.0), np.where(mask, f, 0.0), mask
+
+
+def panel_betas(returns, factor, min_periods=50):
+    """
+    Full-sample beta of each column of `returns` on `factor`.
+
+    Returns a DataFrame indexed by ticker with beta, alpha (daily intercept),
+    correlation and the number of overlapping observations. Tickers with fewer
+    than `min_periods` overlapping days get NaN.
+    """
+    R, f, mask = _masked_inputs(returns, factor)
+    n = mask.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_r = R.sum(axis=0) / n
+        mean_f = f.sum(axis=0) / n
+        # Center within each ticker's own valid days
+        dev_r = np.where(mask, R - mean_r, 0.0)
+        dev_f = np.where(mask, f - mean_f, 0.0)
+        cov = (dev_r * dev_f).sum(axis=0)
+        var_f = (dev_f * dev_f).sum(axis=0)
+        var_r = (dev_r * dev_r).sum(axis=0)
+        beta = cov / var_f
+        corr = cov / np.sqrt(var_f * var_r)
+    alpha = mean_r - beta * mean_f
+
+    exposures = pd.DataFrame({"beta": beta, "alpha": alpha, "corr": corr, "n_obs": n}, index=returns.columns)
+    exposures.loc[n < min_periods, ["beta", "alpha", "corr"]] = np.nan
+    return exposures
+
+
+def _rolling_sum(values, window):
+    total = np.cumsum(values, axis=0)
+    total[window:] = total[window:] - total[:-window]
+    return total
+
+
+def rolling_betas(returns, factor, window=252, min_periods=50):
+    """(date x ticker) betas over a trailing window of `window` rows ending on each date."""
+    R, f, mask = _masked_inputs(returns, factor)
+    n = _rolling_sum(mask.astype(float), window)
+    sum_r = _rolling_sum(R, window)
+    sum_f = _rolling_sum(f, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = _rolling_sum(R * f, window) - sum_r * sum_f / n
+        var_f = _rolling_sum(f * f, window) - sum_f ** 2 / n
+        beta = cov / var_f
+    beta[n < min_periods] = np.nan
+    return pd.DataFrame(beta, index=returns.index, columns=returns.columns)
+
+
+def window_betas(returns, factor, starts, ends, min_periods=50):
+    """(window x ticker) betas over returns dated in each [start, end], all from one set of prefix sums."""
+    R, f, mask = _masked_inputs(returns, factor)
+    lo = returns.index.searchsorted(pd.DatetimeIndex(starts), side="left")
+    hi = returns.index.searchsorted(pd.DatetimeIndex(ends), side="right")
+
+    def window_sum(values):
+        total = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+        return total[hi] - total[lo]
+
+    n = window_sum(mask.astype(float))
+    sum_r = window_sum(R)
+    sum_f = window_sum(f)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = window_sum(R * f) - sum_r * sum_f / n
+        var_f = window_sum(f * f) - sum_f ** 2 / n
+        beta = cov / var_f
+    beta[n < min_periods] = np.nan
+    return pd.DataFrame(beta, index=pd.DatetimeIndex(ends), columns=returns.columns)
@@ -0,0 +1,75 @@
+import os
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import requests
+from artifact_io import read_artifact, write_artifact
+
+"""
+Fed Funds rate (FRED FEDFUNDS) loaded once, cached locally, looked up as of
+any dates.
+
+The whole monthly series is fetched in one request and stored as an Arrow
+artifact; it is refetched only once the local copy is older than
+`max_age_days`. Lookups are vectorized as-of searches: each date gets the
+latest observation dated on or before it (the average rate of that date's
+month), so the rate for every day of a backtest comes from one searchsorted
+call instead of one HTTP request per day. If the series cannot be fetched and
+there is no local copy, every lookup returns `default_rate`.
+
+Does not import `constants`; shared with the index-inclusion strategies
+through sys.path.
+"""
+
+
+FRED_OBSERVATIONS_URL = "https://api.stlouisfed.org/fred/series/observations"
+DEFAULT_RATE = 0.0433  # fallback rate (approx 4.33%)
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "fedfunds.arrow"
+
+
+def fetch_fed_funds(api_key, series_id="FEDFUNDS"):
+    """The whole FRED series as a date-indexed Series of decimal rates."""
+    response = requests.get(FRED_OBSERVATIONS_URL, params={"series_id": series_id, "api_key": api_key,
+                                                           "file_type": "json"}, timeout=30)
+    response.raise_for_status()
+    observations = response.json()["observations"]
+    rates = pd.Series(pd.to_numeric([o["value"] for o in observations], errors="coerce") / 100,
+                      index=pd.DatetimeIndex([o["date"] for o in observations], name="date"), name="rate")
+    return rates.dropna()
+
+
+class FedFundsRates:
+    def __init__(self, api_key, path=DEFAULT_PATH, default_rate=DEFAULT_RATE, max_age_days=1):
+        self.api_key = api_key
+        self.path = Path(path)
+        self.default_rate = default_rate
+        self.max_age_days = max_age_days
+        self.rates = None  # loaded on first lookup
+
+    def load(self):
+        """The cached series, refreshed from FRED if the local copy is missing or stale."""
+        if self.rates is not None:
+            return self.rates
+        stale = not self.path.exists() or time.time() - os.path.getmtime(self.path) > self.max_age_days * 86400
+        if stale:
+            try:
+                write_artifact(fetch_fed_funds(self.api_key).to_frame(), self.path)
+            except Exception as e:
+                print(f"Could not fetch the Fed Funds rate ({e}); using the cached series or {self.default_rate:.2%}.")
+        if self.path.exists():
+            self.rates = read_artifact(self.path)["rate"].sort_index()
+        else:
+            self.rates = pd.Series(dtype=float, name="rate")
+        return self.rates
+
+    def rate(self, dates):
+        """Rate in effect on each of `dates` (a scalar for a single date)."""
+        rates = self.load()
+        scalar = np.ndim(dates) == 0
+        dates = pd.DatetimeIndex([dates] if scalar else dates)
+        position = rates.index.searchsorted(dates, side="right") - 1
+        values = np.full(len(dates), self.default_rate)
+        known = position >= 0
+        values[known] = rates.to_numpy()[position[known]]
+        return float(values[0]) if scalar else values
@@ -0,0 +1,132 @@
+import re
+import sys
+import json
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from tqdm import tqdm
+from polygon_fetch import PolygonFetcher
+from constants import API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE
+
+"""
+Bulk ingestion of daily bars from Polygon's grouped daily aggregates.
+
+One request to /v2/aggs/grouped/locale/us/market/stocks/{date} returns the bar
+of every U.S. stock for that date, so a year of the whole cross-section costs
+about 250 requests instead of one request per ticker. The requests go through
+the shared PolygonFetcher, so they run concurrently under the same
+POLYGON_REQUESTS_PER_MINUTE token bucket and jittered retries as every other
+Polygon call. The per-date results are stacked into a long (date, ticker)
+table and pivoted into (date x ticker) panels.
+
+Responses can be recorded to a directory as they are fetched, and `serve`
+replays a recording directory over HTTP on localhost with the same URL layout,
+so the ingestion can be run against a local stand-in by pointing the fetcher's
+base URL at it:
+
+    python grouped_daily.py serve recordings/ 8000
+    fetch_grouped_range(start, end, PolygonFetcher(API_KEY, "http://127.0.0.1:8000"))
+"""
+
+
+GROUPED_PATH = "/v2/aggs/grouped/locale/us/market/stocks/{date}"
+GROUPED_FIELDS = {"T": "ticker", "o": "open", "h": "high", "l": "low", "c": "close",
+                  "v": "volume", "vw": "vwap", "n": "transactions"}
+
+
+# --- Fetching --- #
+def fetch_grouped_dates(dates, fetcher=None, adjusted=True, record_dir=None):
+    """One DataFrame of all tickers' bars per date (empty on market holidays)."""
+    fetcher = fetcher or PolygonFetcher(API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE)
+    dates = [pd.Timestamp(date).strftime("%Y-%m-%d") for date in dates]
+    responses = fetcher.fetch_json([GROUPED_PATH.format(date=date) for date in dates],
+                                   {"adjusted": str(adjusted).lower()}, progress=len(dates) > 1,
+                                   desc="Fetching grouped daily bars")
+
+    frames = []
+    for date, data in zip(dates, responses):
+        if isinstance(data, Exception):
+            raise data  # A missing date would leave a gap in every ticker's history
+        if record_dir is not None:
+            Path(record_dir).mkdir(parents=True, exist_ok=True)
+            with open(Path(record_dir) / f"{date}.json", "w") as f:
+                json.dump(data, f)
+
+        bars = pd.DataFrame(data.get("results", []), columns=list(GROUPED_FIELDS))
+        bars = bars.rename(columns=GROUPED_FIELDS)
+        bars.insert(0, "date", pd.Timestamp(date))
+        frames.append(bars)
+    return frames
+
+
+def fetch_grouped_daily(date, fetcher=None, adjusted=True, record_dir=None):
+    """All tickers' bars for one date as a DataFrame (empty on market holidays)."""
+    return fetch_grouped_dates([date], fetcher, adjusted, record_dir)[0]
+
+
+def fetch_grouped_range(start, end, fetcher=None, adjusted=True, record_dir=None):
+    """Long table of every ticker's daily bars for each weekday in [start, end]."""
+    frames = fetch_grouped_dates(pd.bdate_range(start, end), fetcher, adjusted, record_dir)
+    bars = pd.concat(frames, ignore_index=True)
+    return bars.astype({col: float for col in list(GROUPED_FIELDS.values())[1:]})
+
+
+def to_panel(bars, field="close", tickers=None):
+    """Pivot the long grouped table into a (date x ticker) panel of one field."""
+    panel = bars.pivot_table(index="date", columns="ticker", values=field, aggfunc="last", dropna=False)
+    return panel if tickers is None else panel.reindex(columns=tickers)
+
+
+def add_to_store(store, bars, tickers, start, end):
+    """Write the grouped bars for `tickers` into a BarStore and mark [start, end] as covered."""
+    by_ticker = dict(tuple(bars[bars["ticker"].isin(tickers)].groupby("ticker")))
+    for ticker in tqdm(tickers, desc="Writing bar store"):
+        frame = by_ticker.get(ticker)
+        if frame is not None:
+            store.add_bars(ticker, frame.drop(columns="ticker").set_index("date"))
+        store.mark_covered(ticker, start, end)
+    store.save_manifest()
+
+
+# --- Local Stand-in Server --- #
+class RecordedGroupedHandler(BaseHTTPRequestHandler):
+    record_dir = None
+
+    def do_GET(self):
+        match = re.fullmatch(GROUPED_PATH.format(date=r"(\d{4}-\d{2}-\d{2})"), self.path.split("?")[0])
+        path = Path(self.record_dir) / f"{match.group(1)}.json" if match else None
+        if path is None or not path.exists():
+            self._send(404, {"status": "NOT_FOUND", "request_id": "local"})
+            return
+        with open(path) as f:
+            self._send(200, json.load(f))
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(record_dir, port=8000, host="127.0.0.1"):
+    """HTTP server replaying recorded grouped daily responses from `record_dir`."""
+    handler = type("Handler", (RecordedGroupedHandler,), {"record_dir": str(record_dir)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        # python grouped_daily.py serve <recording dir> [port]
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 8000
+        server = make_server(sys.argv[2], port)
+        print(f"Serving recorded grouped daily responses from {sys.argv[2]} on port {port}")
+        server.serve_forever()
+    elif len(sys.argv) > 1 and sys.argv[1] == "record":
+        # python grouped_daily.py record <recording dir> <start> <end>
+        bars = fetch_grouped_range(sys.argv[3], sys.argv[4], record_dir=sys.argv[2])
+        print(f"Recorded {bars['date'].nunique()} dates, {len(bars)} bars.")
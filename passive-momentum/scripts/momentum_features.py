@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from constants import BETA_QUANTILE, RETURN_9M_QUANTILE, RETURN_6M_QUANTILE, TOP_N_MOMENTUM
+
+"""
+Momentum features for every ticker from one aligned (date x ticker) close panel.
+
+Point-in-time prices are looked up with as-of indexing: the panel is forward
+filled once alongside the date of each ticker's last real close, so the price
+"as of" any date for all tickers is a single row lookup plus a staleness check.
+The 2-12, 6 and 9 month returns, the Frog-in-the-Pan positive-day ratio, the
+signed FIP score and volatility then come out of a few array operations over
+the whole universe instead of two API calls per ticker per horizon.
+
+Windows reproduce `get_returns` in 2_3_filter-outliers.py: each return runs
+from the last close before (end - lookback) to the last close before end, and
+a close more than `buffer` days older than its date counts as missing.
+
+`momentum_filters` applies stage 4's beta and momentum cuts to a features
+table, for both the single-date pipeline and rolling_selection.py.
+"""
+
+
+# (days the window ends before the entry date, lookback days)
+RETURN_WINDOWS = {
+    "2month_return": (60, 300),  # 2-12 month return, skipping the most recent two months
+    "6month_return": (365, 180),
+    "9month_return": (365, 270),
+}
+
+
+def asof_prices(closes, dates, buffer=5):
+    """
+    Last close strictly before each date in `dates` for every ticker.
+
+    Returns a (date x ticker) DataFrame; a ticker whose last close is more than
+    `buffer` days before the date gets NaN.
+    """
+    dates = pd.DatetimeIndex(dates)
+    values = closes.ffill().to_numpy(dtype=float)
+    # Date of the close each forward-filled value came from
+    stamp = np.where(closes.notna(), closes.index.to_numpy()[:, None], np.datetime64("NaT"))
+    stamp = pd.DataFrame(stamp, index=closes.index, columns=closes.columns).ffill().to_numpy()
+
+    rows = closes.index.searchsorted(dates, side="left") - 1
+    prices = np.full((len(dates), closes.shape[1]), np.nan)
+    valid_rows = rows >= 0
+    prices[valid_rows] = values[rows[valid_rows]]
+    fresh = np.zeros_like(prices, dtype=bool)
+    fresh[valid_rows] = stamp[rows[valid_rows]] >= (dates[valid_rows] - pd.Timedelta(days=buffer)).to_numpy()[:, None]
+    return pd.DataFrame(np.where(fresh, prices, np.nan), index=dates, columns=closes.columns)
+
+
+def window_returns(closes, entry_date, windows=RETURN_WINDOWS, buffer=5):
+    """Return over each (end offset, lookback) window ending before `entry_date`."""
+    entry_date = pd.Timestamp(entry_date)
+    ends = [entry_date - pd.Timedelta(days=end) for end, _ in windows.values()]
+    starts = [end - pd.Timedelta(days=lookback) for end, (_, lookback) in zip(ends, windows.values())]
+    prices = asof_prices(closes, starts + ends, buffer).to_numpy()
+    start_prices, end_prices = prices[:len(windows)], prices[len(windows):]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (end_prices - start_prices) / start_prices
+    return pd.DataFrame(returns.T, index=closes.columns, columns=list(windows))
+
+
+def window_returns_by_date(closes, entry_dates, windows=RETURN_WINDOWS, buffer=5):
+    """
+    Window returns for many entry dates from one as-of lookup.
+
+    Returns {window name: (entry date x ticker) DataFrame}; each row equals
+    `window_returns(closes, entry_date)` for that date.
+    """
+    entry_dates = pd.DatetimeIndex(entry_dates)
+    lookups = []
+    for end, lookback in windows.values():
+        ends = entry_dates - pd.Timedelta(days=end)
+        lookups += [ends - pd.Timedelta(days=lookback), ends]
+    prices = asof_prices(closes, np.concatenate(lookups), buffer).to_numpy().reshape(len(lookups), len(entry_dates), -1)
+    returns = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i, name in enumerate(windows):
+            start_prices, end_prices = prices[2 * i], prices[2 * i + 1]
+            returns[name] = pd.DataFrame((end_prices - start_prices) / start_prices,
+                                         index=entry_dates, columns=closes.columns)
+    return returns
+
+
+def momentum_quality(closes, entry_date, lookback=365):
+    """
+    Frog-in-the-Pan style path features over [entry_date - lookback, entry_date].
+
+    Daily returns are taken between consecutive available closes (gaps are
+    skipped, not filled). momentum_quality is the fraction of positive days
+    (0 with no returns, as in 4_filter-momentum-quality.py); fip is
+    sign(window return) * (% negative days - % positive days), lower is
+    smoother; volatility is annualized.
+    """
+    entry_date = pd.Timestamp(entry_date)
+    window = closes.loc[entry_date - pd.Timedelta(days=lookback):entry_date]
+    daily = (window / window.ffill().shift(1) - 1).where(window.notna())
+    count = daily.notna().sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        positive = (daily > 0).sum() / count
+        negative = (daily < 0).sum() / count
+    first = window.bfill().iloc[0] if len(window) else np.nan
+    last = window.ffill().iloc[-1] if len(window) else np.nan
+    return pd.DataFrame({
+        "momentum_quality": positive.where(count > 0, 0.0),
+        "fip": np.sign(last / first - 1) * (negative - positive),
+        "volatility": daily.std() * np.sqrt(252)
+    })
+
+
+def momentum_features(closes, entry_date, buffer=5, quality_lookback=365):
+    """Window returns and path quality features for every ticker in `closes`."""
+    closes = closes.sort_index()
+    return window_returns(closes, entry_date, buffer=buffer).join(
+        momentum_quality(closes, entry_date, quality_lookback))
+
+
+def momentum_filters(df, beta_quantile=BETA_QUANTILE, return_9m_quantile=RETURN_9M_QUANTILE,
+                     return_6m_quantile=RETURN_6M_QUANTILE, top_n=TOP_N_MOMENTUM):
+    """Beta and momentum filters of 4_filter-momentum-quality.py, keeping the top N by 2-12 month return."""
+    df = df[df['beta'] < df['beta'].quantile(beta_quantile)]
+    df = df[df['9month_return'] > df['9month_return'].quantile(return_9m_quantile)]
+    df = df[df['6month_return'] > df['6month_return'].quantile(return_6m_quantile)]
+    df = df.sort_values(by="2month_return", ascending=False, kind="stable")
+    return df.head(top_n).reset_index(drop=True)
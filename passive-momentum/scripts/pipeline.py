@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import importlib
+import subprocess
+from pathlib import Path
+
+"""
+Cached, incremental runner for the numbered pipeline scripts.
+
+Each stage declares the script it runs, the files it reads and writes, the
+constants it depends on and the shared modules it imports. Stages are ordered
+as a DAG from their inputs and outputs. Before running a stage, a key is built
+from the content hashes of its script, modules and input files plus the values
+of its declared constants. constants.py and artifact_io.py count as modules
+of every stage, so editing either reruns the whole pipeline; the declared
+constants also capture values overridden from the environment (--entry,
+--exit). If the key matches the one recorded in the state file and the
+outputs are still the files that run produced, the stage is skipped. A stage
+that reruns but writes byte-identical outputs does not invalidate the stages
+after it.
+
+    python pipeline.py                        # run whatever is out of date
+    python pipeline.py --entry 2024-05-18 --exit 2025-05-18
+    python pipeline.py --force momentum_beta  # rerun a stage regardless of its cache
+    python pipeline.py --dry-run              # show what would run
+"""
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# Imported by every stage: constants.py for paths and parameters, artifact_io.py for reading and writing artifacts
+SHARED_MODULES = ["constants.py", "artifact_io.py"]
+
+
+# --- Stage Definitions --- #
+def build_stages(c):
+    return [
+        {"name": "universe", "script": "0_fetch_stock_universe.py",
+         "inputs": [], "outputs": [c.US_COMMON_STOCKS_PATH],
+         "params": [], "modules": SHARED_MODULES},
+        {"name": "liquidity", "script": "1_filter-top-1500-liquidity.py",
+         "inputs": [c.US_COMMON_STOCKS_PATH], "outputs": [c.TOP_LIQUID_STOCKS_PATH],
+         "params": ["ENTRY_DATE", "LIQUIDITY_LOOKBACK_DAYS", "MIN_VALID_DAYS", "TOP_N_LIQUID"],
+         "modules": SHARED_MODULES + ["bar_store.py", "grouped_daily.py", "polygon_fetch.py"]},
+        {"name": "momentum_beta", "script": "2_3_filter-outliers.py",
+         "inputs": [c.TOP_LIQUID_STOCKS_PATH], "outputs": [c.MOMENTUM_BETA_PATH],
+         "params": ["ENTRY_DATE"],
+         "modules": SHARED_MODULES + ["bar_store.py", "polygon_fetch.py", "factor_exposure.py",
+                                     "momentum_features.py"]},
+        {"name": "quality", "script": "4_filter-momentum-quality.py",
+         "inputs": [c.MOMENTUM_BETA_PATH], "outputs": [c.MOMENTUM_QUALITY_PATH],
+         "params": ["ENTRY_DATE", "BETA_QUANTILE", "RETURN_9M_QUANTILE", "RETURN_6M_QUANTILE", "TOP_N_MOMENTUM",
+                    "QUALITY_LOOKBACK_DAYS", "TOP_N_QUALITY"],
+         "modules": SHARED_MODULES + ["bar_store.py", "polygon_fetch.py", "momentum_features.py"]},
+        {"name": "weighting", "script": "5_portfolio-weighting.py",
+         "inputs": [c.MOMENTUM_QUALITY_PATH], "outputs": [c.PORTFOLIO_INVESTMENT_PATH],
+         "params": ["PORTFOLIO_SIZE"],
+         "modules": SHARED_MODULES + ["bar_store.py", "polygon_fetch.py"]},
+        {"name": "backtest", "script": "6_backtest.py",
+         "inputs": [c.PORTFOLIO_INVESTMENT_PATH], "outputs": [c.BACKTEST_RESULTS_PATH, c.SPY_RETURNS_PATH],
+         "params": ["ENTRY_DATE", "EXIT_DATE", "PORTFOLIO_SIZE", "REBALANCE_FREQUENCY", "TRANSACTION_COST_BPS"],
+         "modules": SHARED_MODULES + ["bar_store.py", "polygon_fetch.py", "backtest_engine.py"]},
+    ]
+
+
+def topological_order(stages):
+    """Order stages so every stage runs after the stages producing its inputs."""
+    producer = {str(path): stage["name"] for stage in stages for path in stage["outputs"]}
+    by_name = {stage["name"]: stage for stage in stages}
+    ordered, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline has a cycle through stage '{name}'")
+        visiting.add(name)
+        for path in by_name[name]["inputs"]:
+            if str(path) in producer:
+                visit(producer[str(path)])
+        visiting.discard(name)
+        done.add(name)
+        ordered.append(by_name[name])
+
+    for stage in stages:
+        visit(stage["name"])
+    return ordered
+
+
+# --- Hashing --- #
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_key(stage, c):
+    """Hash of everything that determines a stage's outputs."""
+    digest = hashlib.sha256()
+    for module in [stage["script"]] + stage["modules"]:
+        digest.update(module.encode() + file_hash(SCRIPTS_DIR / module).encode())
+    params = {name: str(getattr(c, name)) for name in stage["params"]}
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    for path in stage["inputs"]:
+        if not Path(path).exists():
+            raise FileNotFoundError(f"Stage '{stage['name']}' input {path} is missing")
+        digest.update(str(path).encode() + file_hash(path).encode())
+    return digest.hexdigest()
+
+
+def outputs_intact(stage, record):
+    # Outputs must still be the exact files the recorded run produced
+    return all(Path(path).exists() and record["outputs"].get(str(path)) == file_hash(path)
+               for path in stage["outputs"])
+
+
+# --- State --- #
+def load_state(path):
+    if Path(path).exists():
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state, path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# --- Runner --- #
+def run_pipeline(force=(), dry_run=False):
+    c = importlib.import_module("constants")
+    state = load_state(c.PIPELINE_STATE_PATH)
+
+    for stage in topological_order(build_stages(c)):
+        name = stage["name"]
+        if dry_run and any(not Path(path).exists() for path in stage["inputs"]):
+            print(f"[run]  {name} (inputs not built yet)")
+            continue
+        key = stage_key(stage, c)
+        record = state.get(name)
+        if name not in force and record and record["key"] == key and outputs_intact(stage, record):
+            print(f"[skip] {name}")
+            continue
+
+        print(f"[run]  {name}: {stage['script']}")
+        if dry_run:
+            continue
+        for path in stage["outputs"]:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        subprocess.run([sys.executable, stage["script"]], cwd=SCRIPTS_DIR, env=os.environ.copy(), check=True)
+
+        state[name] = {"key": key, "outputs": {str(path): file_hash(path) for path in stage["outputs"]}}
+        save_state(state, c.PIPELINE_STATE_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the out-of-date passive momentum pipeline stages.")
+    parser.add_argument("--entry", help="portfolio entry date, YYYY-MM-DD (overrides ENTRY_DATE)")
+    parser.add_argument("--exit", help="portfolio exit date, YYYY-MM-DD (overrides EXIT_DATE)")
+    parser.add_argument("--force", nargs="*", default=[], help="stage names to rerun regardless of cache")
+    parser.add_argument("--dry-run", action="store_true", help="only print which stages would run")
+    args = parser.parse_args()
+
+    # Set before constants is imported here, and inherited by every stage subprocess
+    if args.entry:
+        os.environ["ENTRY_DATE"] = args.entry
+    if args.exit:
+        os.environ["EXIT_DATE"] = args.exit
+    run_pipeline(force=set(args.force), dry_run=args.dry_run)
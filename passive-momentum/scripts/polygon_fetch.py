@@ -0,0 +1,155 @@
+import time
+import random
+import asyncio
+import aiohttp
+import pandas as pd
+from tqdm import tqdm
+
+"""
+Async, rate-limited concurrent fetcher for Polygon aggregates.
+
+Requests are issued concurrently over one pooled aiohttp session instead of one
+blocking call at a time. A token bucket spaces them to the plan's rate limit,
+transient failures (429s, 5xx, dropped connections) are retried with
+exponential backoff and full jitter, and identical requests already in flight
+are shared instead of sent twice, so throughput is set by the API quota rather
+than by round-trip latency.
+
+Synchronous scripts call `fetch_frames`, which runs a batch of (ticker, start,
+end) ranges to completion and returns one DataFrame per range, or `fetch_json`
+for any other batch of endpoints (e.g. grouped daily bars). Shared by the
+passive-momentum bar store and the index-inclusion strategies.
+"""
+
+
+DEFAULT_BASE_URL = "https://api.polygon.io"
+AGGS_PATH = "/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{start}/{end}"
+AGG_FIELDS = {"o": "open", "h": "high", "l": "low", "c": "close", "v": "volume", "vw": "vwap", "n": "transactions"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def aggs_to_frame(results):
+    """Polygon aggregate results -> OHLCV DataFrame indexed by bar timestamp (UTC, naive)."""
+    frame = pd.DataFrame(results, columns=["t"] + list(AGG_FIELDS)).rename(columns=AGG_FIELDS)
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("t"), unit="ms"), name="date")
+    return frame.astype(float)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, in bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:  # Waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PolygonFetcher:
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, requests_per_minute=200, max_concurrency=20,
+                 retries=5, backoff=0.5, timeout=30):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    # --- Session (one per event loop) --- #
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.bucket = TokenBucket(self.requests_per_minute / 60)
+        self.inflight = {}
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    # --- Requests --- #
+    async def get_json(self, url, params=None):
+        """GET with rate limiting and jittered retries on transient failures."""
+        params = dict(params or {}, apiKey=self.api_key)
+        for attempt in range(self.retries + 1):
+            await self.bucket.acquire()
+            try:
+                async with self.session.get(url, params=params) as response:
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                    error = aiohttp.ClientResponseError(response.request_info, response.history,
+                                                        status=response.status, message=response.reason)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            # Exponential backoff with full jitter so retries do not arrive in lockstep
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def fetch_aggs(self, ticker, start, end, multiplier=1, timespan="day", adjusted=True):
+        """Bars for one ticker and range; concurrent identical requests share one call."""
+        start = pd.Timestamp(start).strftime("%Y-%m-%d")
+        end = pd.Timestamp(end).strftime("%Y-%m-%d")
+        key = (ticker, start, end, multiplier, timespan, adjusted)
+        if key not in self.inflight:
+            task = asyncio.ensure_future(self._fetch_aggs(*key))
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+            self.inflight[key] = task
+        # Shield so one cancelled caller does not cancel the request for the others
+        return await asyncio.shield(self.inflight[key])
+
+    async def _fetch_aggs(self, ticker, start, end, multiplier, timespan, adjusted):
+        url = self.base_url + AGGS_PATH.format(ticker=ticker, multiplier=multiplier, timespan=timespan,
+                                               start=start, end=end)
+        params = {"adjusted": str(adjusted).lower(), "sort": "asc", "limit": 50000}
+        results = []
+        while url:
+            data = await self.get_json(url, params)
+            results.extend(data.get("results", []))
+            url, params = data.get("next_url"), None  # next_url already carries the query
+        return aggs_to_frame(results)
+
+    # --- Synchronous Entry Point --- #
+    def fetch_frames(self, tasks, progress=False, **kwargs):
+        """
+        Fetch every (ticker, start, end) range in `tasks` concurrently.
+
+        Returns one DataFrame per task, in order; a task that still fails after
+        its retries comes back as the exception instead.
+        """
+        return asyncio.run(self._gather(lambda task: self.fetch_aggs(*task, **kwargs), list(tasks),
+                                        progress, "Fetching aggregates"))
+
+    def fetch_json(self, paths, params=None, progress=False, desc="Fetching"):
+        """
+        GET every path (relative to the base URL) in `paths` concurrently.
+
+        Returns one decoded JSON response per path, in order; a request that
+        still fails after its retries comes back as the exception instead.
+        """
+        return asyncio.run(self._gather(lambda path: self.get_json(self.base_url + path, params), list(paths),
+                                        progress, desc))
+
+    async def _gather(self, fetch_one, items, progress, desc):
+        async with self:
+            with tqdm(total=len(items), desc=desc, disable=not progress) as bar:
+                async def fetch(item):
+                    try:
+                        return await fetch_one(item)
+                    finally:
+                        bar.update()
+                return await asyncio.gather(*(fetch(item) for item in items), return_exceptions=True)
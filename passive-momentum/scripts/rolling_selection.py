@@ -0,0 +1,141 @@
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from polygon_fetch import PolygonFetcher
+from bar_store import BarStore
+from factor_exposure import window_betas
+from momentum_features import window_returns_by_date, momentum_quality, momentum_filters
+from backtest_engine import rebalance_dates, run_backtest
+from artifact_io import read_artifact, write_artifact
+from constants import (API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE, LIQUIDITY_LOOKBACK_DAYS,
+                       MIN_VALID_DAYS, TOP_N_LIQUID, QUALITY_LOOKBACK_DAYS, TOP_N_QUALITY, PORTFOLIO_SIZE,
+                       TRANSACTION_COST_BPS, US_COMMON_STOCKS_PATH, ROLLING_DIR)
+
+"""
+Point-in-time passive momentum selection for a whole series of entry dates.
+
+Stages 1-4 select one portfolio as of ENTRY_DATE. Here the same selection
+(liquidity -> beta and momentum filters -> FIP quality -> top 50) runs for
+every entry date from one cached close/volume panel covering all of them:
+
+- average volume and betas over each date's trailing window are differences
+  of prefix sums computed once over the panel, so overlapping windows share
+  all of their work;
+- 2-12, 6 and 9 month returns for every date come from one as-of lookup;
+- only the path quality of each date's ~100 momentum survivors is computed
+  per date.
+
+Every step uses only bars dated on or before its entry date. The selections
+can be backtested as one equal-weight strategy rebalanced on each entry date:
+
+    python rolling_selection.py --start 2020-01-01 --end 2025-01-01 --freq M --backtest
+"""
+
+
+# --- Shared Selection Steps --- #
+def window_liquidity(close, volume, entry_dates, lookback=LIQUIDITY_LOOKBACK_DAYS):
+    """(entry date x ticker) mean volume and valid day count over [date - lookback, date]."""
+    entry_dates = pd.DatetimeIndex(entry_dates)
+    valid = ((close > 0) & (volume > 0)).to_numpy()
+    values = np.where(valid, volume.to_numpy(dtype=float), 0.0)
+    lo = close.index.searchsorted(entry_dates - pd.Timedelta(days=lookback), side="left")
+    hi = close.index.searchsorted(entry_dates, side="right")
+    total = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    count = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(valid, axis=0)])
+    n = count[hi] - count[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (total[hi] - total[lo]) / n
+    return (pd.DataFrame(mean, index=entry_dates, columns=close.columns),
+            pd.DataFrame(n, index=entry_dates, columns=close.columns))
+
+
+# --- Rolling Selection --- #
+def rolling_selection(close, volume, entry_dates, universe, benchmark="SPY"):
+    """
+    Selected portfolio for every entry date.
+
+    `close` and `volume` are (date x ticker) panels covering the universe and
+    the benchmark from 640 days before the first entry date. Returns one long
+    DataFrame with an entry_date column and the columns of the stage 4 output.
+    """
+    close, volume = close.sort_index(), volume.reindex_like(close)
+    entry_dates = pd.DatetimeIndex(entry_dates)
+
+    # --- Liquidity for every date (stage 1) --- #
+    avg_volume, valid_days = window_liquidity(close[universe], volume[universe], entry_dates)
+
+    # --- Betas against the benchmark for every date (stage 2_3) --- #
+    # Stage 2_3 takes pct_change inside each window, so the first day in the window has no return
+    returns = close.pct_change(fill_method=None)
+    factor = returns.pop(benchmark)
+    window_starts = close.index[close.index.searchsorted(entry_dates - timedelta(days=365))] + pd.Timedelta(days=1)
+    betas = window_betas(returns, factor, window_starts, entry_dates, min_periods=50)
+
+    # --- Momentum returns for every date --- #
+    momentum = window_returns_by_date(close.drop(columns=benchmark), entry_dates)
+
+    selections = []
+    for date in entry_dates:
+        liquid = avg_volume.loc[date][valid_days.loc[date] >= MIN_VALID_DAYS]
+        liquid = liquid.sort_values(ascending=False).head(TOP_N_LIQUID)
+        df = pd.DataFrame({"ticker": liquid.index, "avg_dollar_volume": liquid.to_numpy()})
+        df["beta"] = df["ticker"].map(betas.loc[date])
+        for column, values in momentum.items():
+            df[column] = df["ticker"].map(values.loc[date])
+
+        # --- Filters and FIP quality (stage 4) --- #
+        df = momentum_filters(df)
+        window = close.loc[date - timedelta(days=QUALITY_LOOKBACK_DAYS):date, df["ticker"]]
+        quality = momentum_quality(window, date, lookback=QUALITY_LOOKBACK_DAYS)
+        df["momentum_quality"] = df["ticker"].map(quality["momentum_quality"])
+        df["fip"] = df["ticker"].map(quality["fip"])
+        df = df.sort_values(by="momentum_quality", ascending=False, kind="stable").head(TOP_N_QUALITY)
+        df.insert(0, "entry_date", date)
+        selections.append(df)
+    return pd.concat(selections, ignore_index=True)
+
+
+def equal_weight_schedule(selections):
+    """(entry date x ticker) equal target weights for backtest_engine.run_backtest."""
+    counts = selections.groupby("entry_date")["ticker"].transform("size")
+    weights = selections.assign(weight=1 / counts)
+    return weights.pivot_table(index="entry_date", columns="ticker", values="weight", fill_value=0.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Passive momentum selection for a series of entry dates.")
+    parser.add_argument("--start", required=True, help="first entry date, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last entry date, YYYY-MM-DD")
+    parser.add_argument("--freq", default="M", help='entry date frequency: "M" monthly or "Q" quarterly')
+    parser.add_argument("--backtest", action="store_true", help="backtest the selections rebalanced on each entry date")
+    parser.add_argument("--exit", help="backtest end date, YYYY-MM-DD (default: --end)")
+    args = parser.parse_args()
+
+    start, end = pd.Timestamp(args.start), pd.Timestamp(args.end)
+    exit_date = pd.Timestamp(args.exit) if args.exit else end
+
+    # --- One cached close/volume panel covering every window --- #
+    fetcher = PolygonFetcher(API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE)
+    store = BarStore(fetcher=fetcher)
+    universe = read_artifact(US_COMMON_STOCKS_PATH, columns=["ticker"])["ticker"].tolist()
+    tickers = universe + ["SPY"]
+    close = store.get_panel(tickers, start - timedelta(days=640), max(end, exit_date), field="close")
+    volume = store.get_panel(tickers, start - timedelta(days=640), max(end, exit_date), field="volume", fill=False)
+
+    # --- Entry dates: first trading day of each period --- #
+    entry_dates = rebalance_dates(close.index[(close.index >= start) & (close.index <= end)], args.freq)
+    selections = rolling_selection(close.loc[:end], volume.loc[:end], entry_dates, universe)
+
+    selections_path = ROLLING_DIR / f"selections_{args.start}_{args.end}_{args.freq}.arrow"
+    write_artifact(selections, selections_path, export_csv=True)
+    print(f"Saved {len(entry_dates)} selections to {selections_path}.")
+
+    if args.backtest:
+        schedule = equal_weight_schedule(selections)
+        backtest = run_backtest(close.loc[entry_dates[0]:exit_date, schedule.columns], schedule, PORTFOLIO_SIZE,
+                                cost_bps=TRANSACTION_COST_BPS)
+        write_artifact(backtest["equity_curve"].to_frame(), ROLLING_DIR / f"backtest_{args.start}_{args.end}_{args.freq}.arrow",
+                       export_csv=True)
+        print(f"Total return: {backtest['total_return']:.2%}, CAGR: {backtest['cagr']:.2%}, "
+              f"Sharpe: {backtest['sharpe']:.2f}, max drawdown: {backtest['max_drawdown']:.2%}")
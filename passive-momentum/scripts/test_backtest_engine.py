@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from backtest_engine import rebalance_dates, fixed_weight_schedule, run_backtest
+
+"""
+Checks of the vectorized backtest against the fixed-weight buy-and-hold of
+the original 6_backtest.py.
+
+    python -m pytest test_backtest_engine.py
+"""
+
+
+def make_prices(n=60, late_start=5, seed=0):
+    """Close panel where LATE has no bars before row `late_start`."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-02", periods=n)
+    prices = pd.DataFrame(100 * np.exp(rng.normal(0, 0.01, (n, 3)).cumsum(axis=0)),
+                          index=index, columns=["AAA", "BBB", "LATE"])
+    prices.iloc[:late_start, 2] = np.nan
+    return prices
+
+
+def baseline_value(prices, weights, capital):
+    """Original buy-and-hold: each name's return from its own first bar, weighted and summed."""
+    returns = prices / prices.bfill().iloc[0] - 1
+    return capital * (1 + returns.multiply(weights, axis=1).sum(axis=1))
+
+
+def test_late_starting_ticker_enters_at_its_first_bar():
+    prices = make_prices()
+    weights = pd.Series({"AAA": 0.3, "BBB": 0.3, "LATE": 0.4})
+    schedule = fixed_weight_schedule(weights, rebalance_dates(prices.index))
+    backtest = run_backtest(prices, schedule, 1_000_000)
+
+    np.testing.assert_allclose(backtest["equity_curve"], baseline_value(prices, weights, 1_000_000))
+    # Its weight is held in cash until the first close, then fully invested
+    assert (backtest["weights"]["LATE"].iloc[:5] == 0).all()
+    np.testing.assert_allclose(backtest["cash"].iloc[:5], 400_000)
+    np.testing.assert_allclose(backtest["cash"].iloc[5:], 0, atol=1e-6)
+    assert backtest["weights"]["LATE"].iloc[5] > 0.35
+
+
+def test_late_entry_is_charged_costs_without_negative_cash():
+    prices = make_prices()
+    weights = pd.Series({"AAA": 0.3, "BBB": 0.3, "LATE": 0.4})
+    schedule = fixed_weight_schedule(weights, rebalance_dates(prices.index))
+    backtest = run_backtest(prices, schedule, 1_000_000, cost_bps=10)
+
+    assert (backtest["cash"] > -1e-6).all()
+    # Both the entry rebalance and the late purchase are charged on their notional
+    assert np.isclose(backtest["rebalances"]["turnover"].iloc[0] * 10 / 1e4, backtest["total_cost"], rtol=1e-3)
+    assert backtest["rebalances"]["turnover"].iloc[0] > 990_000
+    assert (backtest["weights"]["LATE"].iloc[5:] > 0).all()
+
+
+def test_ticker_without_any_bar_stays_in_cash():
+    prices = make_prices(late_start=60)
+    weights = pd.Series({"AAA": 0.5, "BBB": 0.25, "LATE": 0.25})
+    schedule = fixed_weight_schedule(weights, rebalance_dates(prices.index, "M"))
+    backtest = run_backtest(prices, schedule, 1_000_000)
+
+    assert (backtest["weights"]["LATE"] == 0).all()
+    rebalanced = backtest["rebalances"].index
+    np.testing.assert_allclose((backtest["cash"] / backtest["equity_curve"])[rebalanced], 0.25)
@@ -0,0 +1,130 @@
+import itertools
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from polygon_fetch import PolygonFetcher
+from bar_store import BarStore
+from momentum_features import momentum_quality
+from constants import (ENTRY_DATE, EXIT_DATE, API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE,
+                       QUALITY_LOOKBACK_DAYS, PORTFOLIO_SIZE, MOMENTUM_BETA_PATH, THRESHOLD_SWEEP_PATH)
+from artifact_io import read_artifact, write_artifact
+
+"""
+Grid sweep of the stage 4 filter thresholds and portfolio sizes.
+
+The feature table from 2_3_filter-outliers.py (plus FIP quality for every
+liquid stock) and one close panel over [ENTRY_DATE, EXIT_DATE] are loaded
+once. Each feature is sorted a single time: the beta and 6/9 month return
+quantiles of any surviving subset are read off the presorted values, and the
+top N by 2-12 month return and top M by quality are prefixes of the presorted
+orders restricted to the survivors. Every configuration becomes one row of an
+equal-weight selection matrix, and all buy-and-hold equity curves come out
+of a single matrix product with the growth panel, so a few hundred
+configurations take seconds.
+
+A configuration equal to the constants reproduces 4_filter-momentum-quality.py
+(ties broken by the earlier sort, as in its stable sorts).
+"""
+
+
+# --- Default Threshold Grid --- #
+SWEEP_GRID = {
+    "beta_quantile": [0.7, 0.8, 0.9],
+    "return_9m_quantile": [0.0, 0.05, 0.1],
+    "return_6m_quantile": [0.0, 0.05, 0.1],
+    "top_n_momentum": [50, 100, 200],
+    "top_n_quality": [20, 30, 50]
+}
+
+
+def _subset_quantile(sorted_values, sorted_mask, q):
+    # Linear-interpolated quantile (as pandas) of the masked, already sorted, non-NaN values
+    values = sorted_values[sorted_mask & ~np.isnan(sorted_values)]
+    if len(values) == 0:
+        return np.nan
+    position = q * (len(values) - 1)
+    lo = int(np.floor(position))
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (position - lo)
+
+
+def sweep_selections(features, grid=SWEEP_GRID):
+    """
+    Selected tickers for every configuration in `grid`.
+
+    `features` has one row per ticker with beta, 2month_return, 6month_return,
+    9month_return and momentum_quality columns. Returns (configs DataFrame,
+    list of selected row positions per config).
+    """
+    beta = features["beta"].to_numpy(dtype=float)
+    r9 = features["9month_return"].to_numpy(dtype=float)
+    r6 = features["6month_return"].to_numpy(dtype=float)
+    r2 = features["2month_return"].to_numpy(dtype=float)
+    quality = features["momentum_quality"].to_numpy(dtype=float)
+
+    # --- Sort each feature once --- #
+    order_beta, order_r9, order_r6 = np.argsort(beta), np.argsort(r9), np.argsort(r6)
+    order_r2 = np.argsort(-r2, kind="stable")  # descending, NaN last
+    r2_rank = np.empty(len(r2), dtype=int)
+    r2_rank[order_r2] = np.arange(len(r2))
+    order_quality = np.lexsort((r2_rank, -quality))  # quality desc, ties in 2-12 month order
+
+    configs, selections = [], []
+    for bq in grid["beta_quantile"]:
+        keep_beta = beta < _subset_quantile(beta[order_beta], np.ones(len(beta), dtype=bool), bq)
+        for q9 in grid["return_9m_quantile"]:
+            keep_9m = keep_beta & (r9 > _subset_quantile(r9[order_r9], keep_beta[order_r9], q9))
+            for q6 in grid["return_6m_quantile"]:
+                survivors = keep_9m & (r6 > _subset_quantile(r6[order_r6], keep_9m[order_r6], q6))
+                ranked = order_r2[survivors[order_r2]]
+                for top_n, top_m in itertools.product(grid["top_n_momentum"], grid["top_n_quality"]):
+                    in_momentum = np.zeros(len(r2), dtype=bool)
+                    in_momentum[ranked[:top_n]] = True
+                    selections.append(order_quality[in_momentum[order_quality]][:top_m])
+                    configs.append({"beta_quantile": bq, "return_9m_quantile": q9, "return_6m_quantile": q6,
+                                    "top_n_momentum": top_n, "top_n_quality": top_m})
+    return pd.DataFrame(configs), selections
+
+
+def sweep_backtests(prices, selections, initial_capital=PORTFOLIO_SIZE, periods_per_year=252):
+    """Equal-weight buy-and-hold statistics for every selection over a (date x ticker) close panel."""
+    prices = prices.ffill()
+    # A name without an entry price keeps its weight in cash, as in backtest_engine.run_backtest
+    growth = (prices / prices.iloc[0]).fillna(1.0).to_numpy()
+    weights = np.zeros((len(selections), prices.shape[1]))
+    for i, selected in enumerate(selections):
+        if len(selected):
+            weights[i, selected] = 1 / len(selected)
+    equity = initial_capital * (growth @ weights.T + (1 - weights.sum(axis=1)))
+    equity = pd.DataFrame(equity, index=prices.index)
+
+    daily_returns = equity.pct_change().iloc[1:]
+    std = daily_returns.std()
+    return pd.DataFrame({
+        "n_holdings": [len(selected) for selected in selections],
+        "total_return": equity.iloc[-1].to_numpy() / initial_capital - 1,
+        "volatility": (std * np.sqrt(periods_per_year)).to_numpy(),
+        "sharpe": (daily_returns.mean() / std.where(std > 0) * np.sqrt(periods_per_year)).to_numpy(),
+        "max_drawdown": (equity / equity.cummax() - 1).min().to_numpy()
+    })
+
+
+if __name__ == "__main__":
+    # --- Feature table (stage 2_3 output) plus quality for every liquid stock --- #
+    features = read_artifact(MOMENTUM_BETA_PATH)
+    tickers = features["ticker"].tolist()
+    fetcher = PolygonFetcher(API_KEY, POLYGON_BASE_URL, POLYGON_REQUESTS_PER_MINUTE)
+    store = BarStore(fetcher=fetcher)
+    closes = store.get_panel(tickers, ENTRY_DATE - timedelta(days=QUALITY_LOOKBACK_DAYS), ENTRY_DATE, field="close")
+    features["momentum_quality"] = features["ticker"].map(
+        momentum_quality(closes, ENTRY_DATE, lookback=QUALITY_LOOKBACK_DAYS)["momentum_quality"])
+
+    # --- Backtest panel over the holding period --- #
+    prices = store.get_panel(tickers, ENTRY_DATE, EXIT_DATE, field="close")
+
+    configs, selections = sweep_selections(features)
+    results = pd.concat([configs, sweep_backtests(prices, selections)], axis=1)
+    results = results.sort_values(by="sharpe", ascending=False).reset_index(drop=True)
+    write_artifact(results, THRESHOLD_SWEEP_PATH, export_csv=True)
+    print(results.head(10).to_string(index=False))
+    print(f"Saved {len(results)} configurations to {THRESHOLD_SWEEP_PATH}.")